@@ -1,15 +1,177 @@
-import os
+import functools
+import queue
+import threading
 
+from Crypto.Cipher import AES
+from Crypto.Util import _cpu_features
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from typing import Tuple
+from typing import BinaryIO, Tuple
+
+from crypto.rng import csprng
+
+STREAM_CHUNK_SIZE = 1 << 20  # 1 MiB
+GCM_TAG_SIZE = 16
+PIPELINE_MIN_SIZE = 4 * STREAM_CHUNK_SIZE  # smaller blobs decrypt serially
+PIPELINE_DEPTH = 4  # chunks read ahead of the decryptor
+
+# Both backends pick their AES implementation at runtime, so no build flags are
+# needed: PyCryptodome dispatches to AESENC/PCLMULQDQ when cpuid reports them.
+HAS_AESNI = bool(_cpu_features.have_aes_ni() and _cpu_features.have_clmul())
+
+
+class _OpenSSLGCM:
+    """PyCryptodome-shaped streaming GCM on top of cryptography's OpenSSL backend."""
+
+    def __init__(self, key: bytes, nonce: bytes):
+        self._cipher = Cipher(algorithms.AES(key), modes.GCM(nonce))
+        self._ctx = None
+
+    def _update(self, data, output, make_ctx):
+        if self._ctx is None:
+            self._ctx = make_ctx()
+        out = self._ctx.update(data)
+        if output is None:
+            return out
+        output[:len(out)] = out
+
+    def encrypt(self, data, output=None):
+        return self._update(data, output, self._cipher.encryptor)
+
+    def decrypt(self, data, output=None):
+        return self._update(data, output, self._cipher.decryptor)
+
+    def digest(self) -> bytes:
+        if self._ctx is None:
+            self._ctx = self._cipher.encryptor()
+        self._ctx.finalize()
+        return self._ctx.tag
+
+    def verify(self, tag: bytes) -> None:
+        if self._ctx is None:
+            self._ctx = self._cipher.decryptor()
+        self._ctx.finalize_with_tag(tag)
+
+
+def _new_gcm(key: bytes, nonce: bytes):
+    """Streaming AES-GCM context: PyCryptodome on AES-NI/CLMUL CPUs, OpenSSL otherwise."""
+    if HAS_AESNI:
+        return AES.new(key, AES.MODE_GCM, nonce=nonce)
+    return _OpenSSLGCM(key, nonce)
+
+
+@functools.lru_cache(maxsize=4)
+def _aead(key: bytes) -> AESGCM:
+    # Kmaster wraps every file key: expand its key schedule once, not per call.
+    # 4 slots cover old+new master during rotation plus a couple of spares.
+    return AESGCM(key)
+
+
+def clear_key_cache() -> None:
+    """Drop cached AESGCM contexts (and the keys they hold) on lock/close."""
+    _aead.cache_clear()
+
 
 def aead_encrypt(key: bytes, plaintext: bytes, aad: bytes | None = None) -> Tuple[bytes, bytes]:
-    nonce = os.urandom(12)
-    aesgcm = AESGCM(key)
-    ct = aesgcm.encrypt(nonce, plaintext, aad)
+    nonce = csprng(12)
+    ct = _aead(key).encrypt(nonce, plaintext, aad)
     return nonce, ct
 
 
 def aead_decrypt(key: bytes, nonce: bytes, ct: bytes, aad: bytes | None = None) -> bytes:
-    aesgcm = AESGCM(key)
-    return aesgcm.decrypt(nonce, ct, aad)
\ No newline at end of file
+    return _aead(key).decrypt(nonce, ct, aad)
+
+
+def aead_encrypt_stream(key: bytes, nonce: bytes, src: BinaryIO, dst: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """AES-256-GCM encrypt src into dst chunk by chunk, appending the 16-byte tag.
+
+    Output is byte-identical to AESGCM.encrypt (ct||tag). Returns the plaintext size.
+    Chunks are encrypted in place in one reused buffer.
+    """
+    cipher = _new_gcm(key, nonce)
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    size = 0
+    while n := src.readinto(buf):
+        chunk = view[:n]
+        cipher.encrypt(chunk, output=chunk)
+        dst.write(chunk)
+        size += n
+    dst.write(cipher.digest())
+    return size
+
+
+def _read_ahead(src: BinaryIO, remaining: int, chunk_size: int, q: queue.Queue, stop: threading.Event) -> None:
+    # Producer for aead_decrypt_stream: reads ciphertext chunks; None marks the end
+    try:
+        while remaining > 0 and not stop.is_set():
+            chunk = src.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            q.put(chunk)
+        q.put(None)
+    except BaseException as e:
+        q.put(e)
+
+
+def aead_decrypt_stream(key: bytes, nonce: bytes, src: BinaryIO, dst: BinaryIO, ct_len: int, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """Decrypt ct_len bytes of ct||tag from src into dst, then verify the tag.
+
+    Plaintext is written before the tag is checked; callers must discard dst on InvalidTag.
+    Blobs over PIPELINE_MIN_SIZE are read ahead on a thread so disk reads overlap
+    with decryption (file reads and both GCM backends release the GIL).
+    """
+    if ct_len < GCM_TAG_SIZE:
+        raise InvalidTag()
+    cipher = _new_gcm(key, nonce)
+    body_len = ct_len - GCM_TAG_SIZE
+    if body_len > PIPELINE_MIN_SIZE:
+        _decrypt_pipelined(cipher, src, dst, body_len, chunk_size)
+    else:
+        buf = bytearray(min(chunk_size, max(body_len, 1)))
+        view = memoryview(buf)
+        remaining = body_len
+        while remaining > 0:
+            n = src.readinto(view[:min(len(buf), remaining)])
+            if not n:
+                raise InvalidTag()
+            chunk = view[:n]
+            cipher.decrypt(chunk, output=chunk)
+            dst.write(chunk)
+            remaining -= n
+    tag = src.read(GCM_TAG_SIZE)
+    try:
+        cipher.verify(tag)
+    except ValueError:
+        raise InvalidTag()
+    return body_len
+
+
+def _decrypt_pipelined(cipher, src: BinaryIO, dst: BinaryIO, body_len: int, chunk_size: int) -> None:
+    q = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_ahead, args=(src, body_len, chunk_size, q, stop), daemon=True)
+    reader.start()
+    out = bytearray(chunk_size)
+    view = memoryview(out)
+    done = 0
+    try:
+        while (chunk := q.get()) is not None:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            n = len(chunk)
+            cipher.decrypt(chunk, output=view[:n])
+            dst.write(view[:n])
+            done += n
+    finally:
+        # Unblock the reader if we bailed out early, then wait so src is ours again
+        stop.set()
+        while reader.is_alive():
+            try:
+                q.get(timeout=0.05)
+            except queue.Empty:
+                pass
+    if done != body_len:
+        raise InvalidTag()
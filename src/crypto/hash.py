@@ -1,4 +1,8 @@
-from argon2.low_level import hash_secret_raw, Type as Argon2Type
+import hashlib
+import importlib
+import os
+import time
+
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 
@@ -8,16 +12,108 @@ def sha3_512_bytes(data: bytes) -> bytes:
     return digest.finalize()
 
 
-def derive_kmaster(passphrase: str, salt: bytes, t_cost: int, m_cost_kib: int, parallelism: int) -> bytes:
-    """Kmaster = Argon2id(SHA3-512(passphrase)) -> 32 bytes"""
-    prehash = sha3_512_bytes(passphrase.encode("utf-8"))
-    kmaster = hash_secret_raw(
+def blake2b_512_bytes(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=64).digest()
+
+
+_argon2 = None
+
+
+def _get_argon2():
+    """argon2.low_level, imported on first key derivation (not on every CLI start)."""
+    global _argon2
+    if _argon2 is None:
+        _argon2 = importlib.import_module("argon2.low_level")
+    return _argon2
+
+
+_gpu = None  # (argon2_gpu module, VRAM bytes) once probed, False if unavailable
+
+
+def _get_gpu_argon2(m_cost_kib: int):
+    """Optional argon2_gpu backend if an OpenCL GPU with room for m_cost is present."""
+    global _gpu
+    if _gpu is None:
+        try:
+            cl = importlib.import_module("pyopencl")
+            vram = max(
+                (d.global_mem_size for pl in cl.get_platforms() for d in pl.get_devices(device_type=cl.device_type.GPU)),
+                default=0,
+            )
+            _gpu = (importlib.import_module("argon2_gpu"), vram) if vram else False
+        except Exception:
+            _gpu = False
+    if _gpu and _gpu[1] >= m_cost_kib * 1024:
+        return _gpu[0]
+    return None
+
+
+PREHASH_SHA3_512 = "sha3-512"
+PREHASH_BLAKE2B_512 = "blake2b-512"
+_PREHASHES = {PREHASH_SHA3_512: sha3_512_bytes, PREHASH_BLAKE2B_512: blake2b_512_bytes}
+
+
+def derive_kmaster(passphrase: str, salt: bytes, t_cost: int, m_cost_kib: int, parallelism: int,
+                   prehash_alg: str = PREHASH_BLAKE2B_512) -> bytes:
+    """Kmaster = Argon2id(BLAKE2b-512(passphrase)) -> 32 bytes (SHA3-512 for v1/v2 vaults)"""
+    prehash = _PREHASHES[prehash_alg](passphrase.encode("utf-8"))
+
+    # Argon2id is deterministic, so a GPU result is bit-identical to the CPU one
+    # as long as the lane count stays the vault's parallelism
+    gpu = _get_gpu_argon2(m_cost_kib)
+    if gpu is not None:
+        try:
+            kmaster = gpu.hash(prehash, salt, t_cost, m_cost_kib, parallelism, lanes=parallelism)
+            if len(kmaster) == 32:
+                return bytes(kmaster)
+        except Exception:
+            pass  # fall back to the CPU below
+
+    argon2 = _get_argon2()
+    kmaster = argon2.hash_secret_raw(
         secret=prehash,
         salt=salt,
         time_cost=t_cost,
         memory_cost=m_cost_kib,
         parallelism=parallelism,
         hash_len=32,
-        type=Argon2Type.ID,
+        type=argon2.Type.ID,
     )
-    return kmaster
\ No newline at end of file
+    return kmaster
+
+
+def default_kdf_resources() -> tuple[int, int]:
+    """(memory KiB, lanes) for calibration: min(RAM/4, 1 GiB) and physical cores."""
+    try:
+        import psutil
+        ram = psutil.virtual_memory().total
+        cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except ImportError:
+        try:
+            ram = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (AttributeError, ValueError, OSError):
+            ram = 1 << 30  # assume 1 GiB -> 256 MiB
+        cores = os.cpu_count() or 1
+    return min(ram // 4, 1 << 30) // 1024, cores
+
+
+def calibrate_t_cost(target_ms: float, m_cost_kib: int, parallelism: int, max_t: int = 64) -> int:
+    """Smallest Argon2id t_cost whose derivation takes at least target_ms here."""
+    salt = os.urandom(16)
+
+    def elapsed_ms(t: int) -> float:
+        start = time.perf_counter()
+        derive_kmaster("calibration", salt, t, m_cost_kib, parallelism)
+        return (time.perf_counter() - start) * 1000
+
+    # Double until we overshoot, then binary-search the last interval
+    lo, hi = 0, 1
+    while hi < max_t and elapsed_ms(hi) < target_ms:
+        lo, hi = hi, min(hi * 2, max_t)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if elapsed_ms(mid) < target_ms:
+            lo = mid
+        else:
+            hi = mid
+    return hi
@@ -0,0 +1,53 @@
+import os
+import threading
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+
+RESEED_INTERVAL = 1 << 30  # reseed from the OS after 1 GiB of output
+
+_lock = threading.Lock()
+_stream = None
+_emitted = 0
+
+
+def _reseed() -> None:
+    global _stream, _emitted
+    _stream = Cipher(algorithms.ChaCha20(os.urandom(32), os.urandom(16)), mode=None).encryptor()
+    _emitted = 0
+
+
+def csprng(n: int) -> bytes:
+    """n random bytes from a ChaCha20 keystream seeded by os.urandom.
+
+    Replaces one getrandom() syscall per key/nonce with a keystream read.
+    Thread-safe; reseeds every RESEED_INTERVAL bytes and in forked children.
+    """
+    global _emitted
+    with _lock:
+        if _stream is None or _emitted >= RESEED_INTERVAL:
+            _reseed()
+        _emitted += n
+        return _stream.update(bytes(n))
+
+
+def csprng_into(buf: bytearray) -> bytearray:
+    """Fill buf with random bytes in place (for keys that are later zeroized)."""
+    global _emitted
+    n = len(buf)
+    with _lock:
+        if _stream is None or _emitted >= RESEED_INTERVAL:
+            _reseed()
+        _emitted += n
+        _stream.update_into(bytes(n), buf)
+    return buf
+
+
+def _drop_after_fork() -> None:
+    # A child must never replay the parent's keystream (key/nonce reuse)
+    global _stream, _lock
+    _lock = threading.Lock()
+    _stream = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_after_fork)
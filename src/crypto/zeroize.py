@@ -0,0 +1,12 @@
+import ctypes
+
+
+def zeroize(buf: bytearray) -> None:
+    """Overwrite a mutable key buffer with zeros in place.
+
+    Only bytearray (or other writable buffers) can be wiped; bytes copies
+    handed to a library are outside our control.
+    """
+    n = len(buf)
+    if n:
+        ctypes.memset((ctypes.c_char * n).from_buffer(buf), 0, n)
@@ -6,18 +6,19 @@ Changes in this version:
 - Replaces JSON envelope `data.enc` with a **binary vault file** `vault.enc`.
 - `vault.enc` contains ONLY opaque binary data. There is **no readable JSON header** anymore.
 - Minimal fixed-size binary header stores KDF params + salt + AEAD nonce; the rest is ciphertext.
-- Unlocking requires the master passphrase to derive Kmaster and decrypt the inner JSON metadata.
+- Unlocking requires the master passphrase to derive Kmaster and decrypt the inner metadata
+  (msgpack since vault v2; v1 vaults with JSON metadata are still read).
 - Per-file random AES-256 keys are wrapped under Kmaster and blobs remain separate (nonce||ct), still opaque.
 
 Binary header (big-endian):
     magic     : 4 bytes   -> b"EFS1"
-    version   : 1 byte    -> 0x01
+    version   : 1 byte    -> 0x03 (0x01/0x02 still readable; v3 pre-hashes with BLAKE2b-512, older with SHA3-512)
     t_cost    : u32
     m_cost    : u32  (KiB)
     parallel  : u32
     salt      : 16 bytes
     nonce     : 12 bytes
-    ciphertext: remaining bytes (AES-256-GCM over inner JSON)
+    ciphertext: remaining bytes (AES-256-GCM over the inner metadata)
 
 Vault layout:
   vault/
@@ -27,31 +28,35 @@ Vault layout:
 
 Commands:
   init                 Initialize vault (create vault.enc)
-  add <path>           Add a plaintext file (encrypt -> blobs/<uuid>.bin; update vault)
+  add <path>...        Add plaintext file(s) (encrypt -> blobs/<uuid>.bin; update vault once)
   ls                   List files (after unlock)
   extract <id> <out>   Decrypt by id to output path
-  rm <id>              Remove a file (deletes blob and metadata entry)
+  rm <id>...           Remove file(s) (deletes blobs and metadata entries; vault written once)
   rename <id> <name>   Rename a file entry (metadata only)
   rotate-master        Rotate master key (new Argon2 params/salt, rewrap all per-file keys)
+  calibrate            Suggest Argon2 params (t, m, p) for ~500 ms unlock on this machine
   gui                  Launch minimal GUI (PyQt6) for browse/extract
 
 Security choices:
   - AEAD: AES-256-GCM via cryptography.hazmat
   - Argon2id via argon2-cffi low-level API
-  - Kmaster = Argon2id(SHA3-512(passphrase)) -> 32 bytes or 256 bits
+  - Kmaster = Argon2id(BLAKE2b-512(passphrase)) -> 32 bytes or 256 bits (SHA3-512 before vault v3)
 """
 from __future__ import annotations
 import argparse
+import multiprocessing
 import sys
-from ui.cli import build_parser
-from ui.gui import cmd_gui
+from ui.cli import build_parser, FAST_COMMANDS
 
 def main():
+    # Batch add encrypts blobs in worker processes; required for frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     if len(sys.argv) == 1:
+        from ui.gui import cmd_gui
         cmd_gui(argparse.Namespace(repo=None))
         return
-        
-    parser = build_parser()
+
+    parser = build_parser(only=sys.argv[1] if sys.argv[1] in FAST_COMMANDS else None)
     args = parser.parse_args()
     args.func(args)
 
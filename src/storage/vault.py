@@ -1,13 +1,12 @@
 import os
-import struct
 
-from utils.dataModels import VAULT_HDR_FMT, VAULT_MAGIC, VAULT_VERSION, VAULT_HDR_SIZE
+from utils.dataModels import VAULT_HDR, VAULT_MAGIC, VAULT_VERSION, VAULT_SUPPORTED_VERSIONS, VAULT_HDR_SIZE
 
 from pathlib import Path
 from typing import Tuple
 
-def save_vault(path: Path, t: int, m: int, p: int, salt: bytes, nonce: bytes, ct: bytes) -> None:
-    header = struct.pack(VAULT_HDR_FMT, VAULT_MAGIC, VAULT_VERSION, t, m, p, salt, nonce)
+def save_vault(path: Path, t: int, m: int, p: int, salt: bytes, nonce: bytes, ct: bytes, ver: int = VAULT_VERSION) -> None:
+    header = VAULT_HDR.pack(VAULT_MAGIC, ver, t, m, p, salt, nonce)
     tmp = path.with_suffix(".tmp")
     with tmp.open("wb") as f:
         f.write(header)
@@ -15,14 +14,28 @@ def save_vault(path: Path, t: int, m: int, p: int, salt: bytes, nonce: bytes, ct
     os.replace(tmp, path)
 
 
-def load_vault(path: Path) -> Tuple[int, int, int, bytes, bytes, bytes]:
-    data = path.read_bytes()
-    if len(data) < VAULT_HDR_SIZE:
+def _read_header(f) -> Tuple[int, int, int, bytes, bytes, int]:
+    header = f.read(VAULT_HDR_SIZE)
+    if len(header) < VAULT_HDR_SIZE:
         raise ValueError("vault.enc is too small or corrupt")
-    magic, ver, t, m, p, salt, nonce = struct.unpack(VAULT_HDR_FMT, data[:VAULT_HDR_SIZE])
+    magic, ver, t, m, p, salt, nonce = VAULT_HDR.unpack_from(header)
     if magic != VAULT_MAGIC:
         raise ValueError("Invalid vault magic")
-    if ver != VAULT_VERSION:
+    if ver not in VAULT_SUPPORTED_VERSIONS:
         raise ValueError("Unsupported vault version")
-    ct = data[VAULT_HDR_SIZE:]
-    return t, m, p, salt, nonce, ct
+    return t, m, p, salt, nonce, ver
+
+
+def load_vault_header(path: Path) -> Tuple[int, int, int, bytes, bytes, int]:
+    """(t, m, p, salt, nonce, ver) of vault.enc without reading the ciphertext."""
+    with path.open("rb") as f:
+        return _read_header(f)
+
+
+def load_vault(path: Path) -> Tuple[int, int, int, bytes, bytes, bytes, int]:
+    # Read header and ciphertext separately so the ciphertext is not copied
+    # out of a whole-file buffer by slicing
+    with path.open("rb") as f:
+        t, m, p, salt, nonce, ver = _read_header(f)
+        ct = f.read()
+    return t, m, p, salt, nonce, ct, ver
@@ -1,4 +1,5 @@
 import sys
+from collections import OrderedDict
 from pathlib import Path
 
 try:
@@ -7,6 +8,116 @@ except Exception as e:
     print("[!] PyQt6 not installed. pip install PyQt6")
     sys.exit(1)
 
+# Convention: turn a QImage into a pixmap with QtGui.QPixmap.fromImage(img), never
+# QtGui.QPixmap(img); the latter goes through an emulated sip constructor and is
+# measurably slower, which adds up on paths that rebuild pixmaps while zooming.
+
+
+class _ImageCanvas(QtWidgets.QWidget):
+    """Paints a pixmap at a draw scale; the painter does the scaling during interactive zoom."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pixmap = None
+        self._draw_scale = 1.0
+        self.setBackgroundRole(QtGui.QPalette.ColorRole.Base)
+        self.setAutoFillBackground(True)
+
+    def set_pixmap(self, pixmap: QtGui.QPixmap, draw_scale: float = 1.0):
+        self._pixmap = pixmap
+        self._draw_scale = draw_scale
+        self.setFixedSize(max(1, int(pixmap.width() * draw_scale)), max(1, int(pixmap.height() * draw_scale)))
+        self.update()
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            return
+        painter = QtGui.QPainter(self)
+        # Nearest-neighbour while zooming: cost is bounded by the exposed area, not the image
+        painter.setRenderHint(QtGui.QPainter.RenderHint.SmoothPixmapTransform, False)
+        if self._draw_scale != 1.0:
+            painter.scale(self._draw_scale, self._draw_scale)
+        painter.drawPixmap(0, 0, self._pixmap)
+        painter.end()
+
+
+# Bound once: enum lookups go through several sip attribute hops per access
+_CTRL = QtCore.Qt.KeyboardModifier.ControlModifier
+
+
+def _image_levels(image: QtGui.QImage, min_size: int, min_level: int) -> list:
+    """[image, image/2, image/4, ...] down to min_level; just [image] below min_size."""
+    levels = [image]
+    if max(image.width(), image.height()) < min_size:
+        return levels
+    while max(levels[-1].width(), levels[-1].height()) > min_level:
+        prev = levels[-1]
+        levels.append(prev.scaled(
+            max(1, prev.width() // 2), max(1, prev.height() // 2),
+            QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+            QtCore.Qt.TransformationMode.SmoothTransformation,
+        ))
+    return levels
+
+
+def _image_reader(source) -> tuple[QtGui.QImageReader, QtCore.QBuffer | None]:
+    """QImageReader over a file path or in-memory image data (a QByteArray).
+
+    For data the reader works through the returned QBuffer, which has to be kept
+    alive as long as the reader is used.
+    """
+    if isinstance(source, QtCore.QByteArray):
+        device = QtCore.QBuffer()
+        device.setData(source)  # implicitly shared, not copied
+        device.open(QtCore.QIODevice.OpenModeFlag.ReadOnly)
+        reader = QtGui.QImageReader(device)
+    else:
+        device = None
+        reader = QtGui.QImageReader(source)
+    reader.setAutoTransform(True)
+    return reader, device
+
+
+class _DecodeSignals(QtCore.QObject):
+    decoded = QtCore.pyqtSignal(object)  # list of QImage levels, largest first; [] on failure
+
+
+class _FullDecoder(QtCore.QRunnable):
+    """Decodes the full-resolution image (and its pyramid) on a pool thread.
+
+    Works on QImage only; pixmaps must be created on the GUI thread.
+    """
+
+    def __init__(self, source, min_size: int, min_level: int):
+        super().__init__()
+        self.source = source
+        self.min_size = min_size
+        self.min_level = min_level
+        self.signals = _DecodeSignals()
+
+    def run(self):
+        reader, _device = _image_reader(self.source)
+        image = reader.read()
+        self.signals.decoded.emit([] if image.isNull() else _image_levels(image, self.min_size, self.min_level))
+
+
+class _WheelScrollArea(QtWidgets.QScrollArea):
+    """Scroll area that hands Ctrl+wheel to a zoom callback and scrolls otherwise.
+
+    Overriding wheelEvent keeps every other viewport event in C++, unlike an event filter.
+    """
+
+    def __init__(self, on_ctrl_wheel, parent=None):
+        super().__init__(parent)
+        self._on_ctrl_wheel = on_ctrl_wheel
+
+    def wheelEvent(self, event):
+        if event.modifiers() & _CTRL and self._on_ctrl_wheel(event):
+            event.accept()
+            return
+        super().wheelEvent(event)
+
+
 class ImageViewer(QtWidgets.QDialog):
     # Epsilon for floating-point scale comparison
     SCALE_EPSILON = 1e-6
@@ -17,13 +128,47 @@ class ImageViewer(QtWidgets.QDialog):
     SLIDER_MAX_PERCENT = 400
     SLIDER_STEP = 5
     SLIDER_DEFAULT_PERCENT = 100
+    SLIDER_DEBOUNCE_MS = 30  # coalesce drag ticks to at most one rescale per interval
+
+    # Images larger than this are first decoded downscaled; full resolution is
+    # only decoded when zooming past what the preview can show
+    PREVIEW_WIDTH = 800
+    PREVIEW_HEIGHT = 600
+
+    # Full-resolution images this large get a halving pyramid to scale down from
+    PYRAMID_MIN_SIZE = 4096
+    PYRAMID_MIN_LEVEL = 256
+
+    # While hidden/minimized, full-resolution sources at least this large are dropped
+    RELEASE_ON_HIDE_BYTES = 64 * 1024 * 1024
+
+    SMOOTH_DELAY_MS = 150  # idle time after interactive zoom before the smooth resample
+
+    # Scaled pixmap cache, bounded by entry count and total pixel bytes
+    SCALED_CACHE_ENTRIES = 16
+    SCALED_CACHE_BYTES = 256 * 1024 * 1024
     
-    def __init__(self, image_path: str, parent=None):
+    def __init__(self, image_path: str, parent=None, data: bytes | None = None):
+        """Show the image at image_path, or, given data, the image it holds.
+
+        With data the image is decoded from memory and image_path only names the
+        window; nothing is read from disk.
+        """
         super().__init__(parent)
         self._filename = Path(image_path).name
         self.setWindowTitle(f"Image Viewer - {self._filename}")
+        self._title_percent = None
         self.resize(800, 600)
-        self._pixmap_orig = None
+        self._source = QtCore.QByteArray(data) if data is not None else image_path
+        self._pixmap_orig = None  # preview or full-resolution source pixmap
+        self._full_size = None  # size of the image at 100%
+        self._full_w = self._full_h = 0  # same, as plain ints for the zoom arithmetic
+        self._full_loaded = False
+        self._levels = []  # _pixmap_orig, then successive halvings (largest first)
+        self._preview = None  # first (downscaled) decode, kept to fall back to on hide
+        self._decoder = None  # pending full-resolution decode, if any
+        self._scaled_cache: OrderedDict[tuple[int, bool], QtGui.QPixmap] = OrderedDict()
+        self._scaled_cache_bytes = 0
         self._scale = 1.0
         self._min_scale = 0.1
         self._max_scale = 4.0
@@ -31,28 +176,40 @@ class ImageViewer(QtWidgets.QDialog):
         layout = QtWidgets.QVBoxLayout(self)
         
         # Image label with scroll area
-        scroll_area = QtWidgets.QScrollArea()
+        scroll_area = _WheelScrollArea(self._ctrl_wheel_zoom)
         self.scroll_area = scroll_area
-        self.image_label = QtWidgets.QLabel()
-        self.image_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setBackgroundRole(QtGui.QPalette.ColorRole.Base)
-        self.image_label.setSizePolicy(QtWidgets.QSizePolicy.Policy.Ignored, QtWidgets.QSizePolicy.Policy.Ignored)
-        self.image_label.setScaledContents(False)
-        
+
         # Load and display image
         self._image_loaded = False
-        pixmap = QtGui.QPixmap(image_path)
+        pixmap = self._read_preview()
         if pixmap.isNull():
-            self.image_label.setText("Failed to load image")
+            self.image_label = QtWidgets.QLabel("Failed to load image")
+            self.image_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         else:
+            self.image_label = _ImageCanvas()
             self._pixmap_orig = pixmap
-            self.image_label.setPixmap(self._pixmap_orig)
-            self._scale = 1.0
+            self._levels = [pixmap]
+            self._preview = pixmap
+            self.image_label.set_pixmap(self._pixmap_orig)
+            self._full_w, self._full_h = self._full_size.width(), self._full_size.height()
+            self._scale = pixmap.width() / self._full_w if self._full_w else 1.0
             self._image_loaded = True
-        
+
+        # Interactive zoom paints the original scaled; one smooth resample once it settles
+        self._smooth_timer = QtCore.QTimer(self)
+        self._smooth_timer.setSingleShot(True)
+        self._smooth_timer.setInterval(self.SMOOTH_DELAY_MS)
+        self._smooth_timer.timeout.connect(self._finalize_smooth)
+
+        # Slider drags fire valueChanged per pixel; only the latest value is applied
+        self._pending_scale = None
+        self._slider_timer = QtCore.QTimer(self)
+        self._slider_timer.setSingleShot(True)
+        self._slider_timer.setInterval(self.SLIDER_DEBOUNCE_MS)
+        self._slider_timer.timeout.connect(self._apply_pending_scale)
+
         scroll_area.setWidget(self.image_label)
-        scroll_area.setWidgetResizable(False)
-        scroll_area.viewport().installEventFilter(self)
+        scroll_area.setWidgetResizable(not self._image_loaded)
         layout.addWidget(scroll_area)
 
         # Zoom controls
@@ -93,51 +250,148 @@ class ImageViewer(QtWidgets.QDialog):
         layout.addWidget(close_btn)
 
         # Wire controls
-        self.zoom_in_btn.clicked.connect(lambda: self._zoom_by(self.ZOOM_FACTOR))
-        self.zoom_out_btn.clicked.connect(lambda: self._zoom_by(1.0/self.ZOOM_FACTOR))
+        self.zoom_in_btn.clicked.connect(self._zoom_in)
+        self.zoom_out_btn.clicked.connect(self._zoom_out)
         self.fit_btn.clicked.connect(self._fit_to_window)
         self.actual_btn.clicked.connect(self._actual_size)
         self.zoom_slider.valueChanged.connect(self._slider_changed)
+        self.zoom_slider.sliderReleased.connect(self._slider_released)
 
         # Initial fit - deferred to ensure viewport has correct size
         if self._pixmap_orig is not None:
             QtCore.QTimer.singleShot(0, self._fit_to_window)
 
-    def eventFilter(self, obj, event):
-        # Only zoom when Ctrl is held; otherwise let wheel scroll normally
-        if obj is self.scroll_area.viewport() and isinstance(event, QtGui.QWheelEvent):
-            if self._pixmap_orig is None:
-                return False
-            if event.modifiers() & QtCore.Qt.KeyboardModifier.ControlModifier:
-                delta = event.angleDelta().y()
-                if delta == 0:
-                    return False
-                factor = self.ZOOM_FACTOR if delta > 0 else (1.0/self.ZOOM_FACTOR)
-                self._zoom_by(factor)
-                event.accept()
-                return True
-            # No Ctrl: allow default scroll behavior
+    def _ctrl_wheel_zoom(self, event) -> bool:
+        # Only called with Ctrl held; returns False to let the wheel scroll normally
+        if self._pixmap_orig is None:
+            return False
+        delta = event.angleDelta().y()
+        if delta == 0:
             return False
-        return super().eventFilter(obj, event)
+        if delta > 0:
+            self._zoom_in()
+        else:
+            self._zoom_out()
+        return True
 
-    def _update_pixmap_scaled(self, smooth: bool = True):
-        if self._pixmap_orig is None:
+    def _read_preview(self) -> QtGui.QPixmap:
+        """Decode the image, downscaled in the decoder (e.g. JPEG DCT scaling) if large."""
+        reader, _device = _image_reader(self._source)
+        size = reader.size()
+        if size.isValid() and (size.width() > self.PREVIEW_WIDTH or size.height() > self.PREVIEW_HEIGHT):
+            reader.setScaledSize(size.scaled(
+                self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT, QtCore.Qt.AspectRatioMode.KeepAspectRatio
+            ))
+        image = reader.read()
+        if image.isNull():
+            return QtGui.QPixmap()
+        # Auto-transform may rotate by 90 degrees; report the size as displayed
+        if not size.isValid() or not reader.scaledSize().isValid():
+            size = image.size()
+        elif reader.transformation() & QtGui.QImageIOHandler.Transformation.TransformationRotate90:
+            size = size.transposed()
+        self._full_size = size
+        self._full_loaded = image.size() == self._full_size
+        return QtGui.QPixmap.fromImage(image)
+
+    def _request_full_resolution(self):
+        # The preview covers scales up to its own size; beyond that decode the original
+        # once, off the GUI thread, and keep showing the upscaled preview meanwhile
+        if (self._full_loaded or self._decoder is not None
+                or self._scale * self._full_w <= self._pixmap_orig.width()):
             return
-        scaled_width = max(1, int(self._pixmap_orig.width() * self._scale))
-        scaled_height = max(1, int(self._pixmap_orig.height() * self._scale))
+        self._decoder = _FullDecoder(self._source, self.PYRAMID_MIN_SIZE, self.PYRAMID_MIN_LEVEL)
+        self._decoder.signals.decoded.connect(self._on_full_decoded)
+        QtCore.QThreadPool.globalInstance().start(self._decoder)
+
+    def _on_full_decoded(self, images: list):
+        self._decoder = None
+        # Hidden meanwhile: don't hold the big buffers (the next show asks again)
+        if not images or self._full_loaded or not self.isVisible():
+            return
+        self._levels = [QtGui.QPixmap.fromImage(image) for image in images]
+        self._pixmap_orig = self._levels[0]
+        self._full_loaded = True
+        self._clear_scaled_cache()
+        self._finalize_smooth()
+
+    def _level_for(self, width: int) -> QtGui.QPixmap:
+        # Smallest level still at least as wide as the target: the resample reads
+        # (and the painter touches) far fewer source pixels when zoomed out
+        for level in reversed(self._levels):
+            if level.width() >= width:
+                return level
+        return self._levels[0]
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        # Minimized or hidden: drop the full-resolution source, its pyramid and the
+        # scaled copies; the preview stays so showing again is immediate
+        if (self._full_loaded and self._preview is not None
+                and self._pixmap_bytes(self._pixmap_orig) >= self.RELEASE_ON_HIDE_BYTES):
+            self._smooth_timer.stop()
+            self._pixmap_orig = self._preview
+            self._levels = [self._preview]
+            self._full_loaded = False
+            self._clear_scaled_cache()
+            self.image_label.set_pixmap(self._preview, self._scale * self._full_w / self._preview.width())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._pixmap_orig is not None and not self._full_loaded:
+            # Re-render (re-decoding full resolution if the current zoom needs it)
+            self._smooth_timer.start()
+
+    def _clear_scaled_cache(self):
+        self._scaled_cache.clear()
+        self._scaled_cache_bytes = 0
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: QtGui.QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def _scaled_pixmap(self, smooth: bool) -> QtGui.QPixmap:
+        """Scaled copy of the original for the current scale, cached per (scale, smooth)."""
+        key = (int(round(self._scale * 1000)), smooth)
+        scaled = self._scaled_cache.get(key)
+        if scaled is not None:
+            self._scaled_cache.move_to_end(key)
+            return scaled
+
+        scaled_width = max(1, int(self._full_w * self._scale))
+        scaled_height = max(1, int(self._full_h * self._scale))
         transformation_mode = (
             QtCore.Qt.TransformationMode.SmoothTransformation
             if smooth
             else QtCore.Qt.TransformationMode.FastTransformation
         )
-        scaled = self._pixmap_orig.scaled(
+        scaled = self._level_for(scaled_width).scaled(
             scaled_width,
             scaled_height,
             QtCore.Qt.AspectRatioMode.KeepAspectRatio,
             transformation_mode,
         )
-        self.image_label.setPixmap(scaled)
-        self.image_label.setFixedSize(scaled.size())
+        self._scaled_cache[key] = scaled
+        self._scaled_cache_bytes += self._pixmap_bytes(scaled)
+        while self._scaled_cache and (
+            len(self._scaled_cache) > self.SCALED_CACHE_ENTRIES or self._scaled_cache_bytes > self.SCALED_CACHE_BYTES
+        ):
+            _, evicted = self._scaled_cache.popitem(last=False)
+            self._scaled_cache_bytes -= self._pixmap_bytes(evicted)
+        return scaled
+
+    def _update_pixmap_scaled(self, smooth: bool = True):
+        if self._pixmap_orig is None:
+            return
+        if smooth:
+            self._smooth_timer.stop()
+            self._finalize_smooth()
+        else:
+            # No resample per event; restart the settle timer instead
+            target_width = self._scale * self._full_w
+            source = self._level_for(int(target_width))
+            self.image_label.set_pixmap(source, target_width / source.width())
+            self._smooth_timer.start()
         val = int(round(self._scale * 100))
         if val != self.zoom_slider.value():
             old_block_state = self.zoom_slider.blockSignals(True)
@@ -145,10 +399,19 @@ class ImageViewer(QtWidgets.QDialog):
                 self.zoom_slider.setValue(max(self.zoom_slider.minimum(), min(self.zoom_slider.maximum(), val)))
             finally:
                 self.zoom_slider.blockSignals(old_block_state)
-        self.setWindowTitle(f"Image Viewer - {self._filename} ({int(self._scale*100)}%)")
+        percent = int(self._scale*100)
+        if percent != self._title_percent:
+            # Built from the stored filename; only pushed to Qt when the shown percent changes
+            self._title_percent = percent
+            self.setWindowTitle(f"Image Viewer - {self._filename} ({percent}%)")
+
+    def _finalize_smooth(self):
+        if self._pixmap_orig is not None:
+            self._request_full_resolution()
+            self.image_label.set_pixmap(self._scaled_pixmap(True))
 
     def _set_scale(self, scale: float, smooth: bool = True):
-        clamped_scale = max(self._min_scale, min(self._max_scale, scale))
+        clamped_scale = self._min_scale if scale < self._min_scale else self._max_scale if scale > self._max_scale else scale
         if abs(clamped_scale - self._scale) < self.SCALE_EPSILON:
             return
         self._scale = clamped_scale
@@ -157,25 +420,44 @@ class ImageViewer(QtWidgets.QDialog):
     def _zoom_by(self, factor: float):
         if self._pixmap_orig is None:
             return
-        # Use fast transformation during interactive zooming for better performance
+        # Interactive: painter-side scaling now, smooth resample after SMOOTH_DELAY_MS
         self._set_scale(self._scale * factor, smooth=False)
 
+    def _zoom_in(self):
+        self._zoom_by(self.ZOOM_FACTOR)
+
+    def _zoom_out(self):
+        self._zoom_by(1.0/self.ZOOM_FACTOR)
+
     def _slider_changed(self, val: int):
-        # Slider changes are typically interactive; use fast scaling for responsiveness
-        self._set_scale(val / 100.0, smooth=False)
+        # Slider changes are typically interactive; defer the smooth resample
+        self._pending_scale = val / 100.0
+        if not self._slider_timer.isActive():
+            self._slider_timer.start()
+
+    def _apply_pending_scale(self):
+        if self._pending_scale is not None:
+            self._set_scale(self._pending_scale, smooth=False)
+            self._pending_scale = None
+
+    def _slider_released(self):
+        # Drag finished: apply the final value and render it smoothly right away
+        self._slider_timer.stop()
+        self._apply_pending_scale()
+        self._smooth_timer.stop()
+        self._finalize_smooth()
 
     def _fit_to_window(self):
         if self._pixmap_orig is None:
             return
-        viewport_size = self.scroll_area.viewport().size()
-        if self._pixmap_orig.width() == 0 or self._pixmap_orig.height() == 0:
+        if self._full_w == 0 or self._full_h == 0:
             # Avoid division by zero and keep the viewer in a consistent state.
             # Set a reasonable default scale without showing a popup
             self._set_scale(1.0)
             return
-        scale_x = viewport_size.width() / self._pixmap_orig.width()
-        scale_y = viewport_size.height() / self._pixmap_orig.height()
-        self._set_scale(max(self._min_scale, min(self._max_scale, min(scale_x, scale_y))))
+        viewport_size = self.scroll_area.viewport().size()
+        # _set_scale clamps to [_min_scale, _max_scale]
+        self._set_scale(min(viewport_size.width() / self._full_w, viewport_size.height() / self._full_h))
 
     def _actual_size(self):
         if self._pixmap_orig is None:
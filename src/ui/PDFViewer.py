@@ -11,6 +11,10 @@ except Exception as e:
     print("[!] PyQt6 WebEngine not available, using fallback method")
     WEBENGINE_AVAILABLE = False
 
+# Parsed once per label; load state switches a property instead of re-setting a stylesheet
+_STATUS_STYLE = 'QLabel[state="ok"] { color: green; } QLabel[state="error"] { color: red; }'
+
+
 class PDFViewer(QtWidgets.QDialog):
     def __init__(self, pdf_path: str, parent=None):
         super().__init__(parent)
@@ -24,43 +28,33 @@ class PDFViewer(QtWidgets.QDialog):
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(10)
         
-        if WEBENGINE_AVAILABLE:
-            self.setup_webengine_view(pdf_path, layout)
-        else:
-            self.setup_fallback_view(pdf_path, layout)
-        
         self.pdf_path = pdf_path
         self.zoom_factor = 1.0
+        self._loaded = False
+
+        # Build the whole widget tree before any layout pass or repaint runs
+        self.setUpdatesEnabled(False)
+        try:
+            if WEBENGINE_AVAILABLE:
+                self.setup_webengine_view(pdf_path, layout)
+            else:
+                self.setup_fallback_view(pdf_path, layout)
+        finally:
+            self.setUpdatesEnabled(True)
     
     def setup_webengine_view(self, pdf_path: str, layout: QtWidgets.QVBoxLayout):
         """Setup WebEngine-based PDF viewer."""
-        # Create web engine page with proper settings
-        self.web_page = QWebEnginePage()
-        self.web_page.settings().setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
-        self.web_page.settings().setAttribute(QWebEngineSettings.WebAttribute.PdfViewerEnabled, True)
-        
-        # Web engine view for PDF display
-        self.web_view = QWebEngineView()
-        self.web_view.setPage(self.web_page)
-        
-        # Set minimum size for web view to ensure it's visible
-        self.web_view.setMinimumSize(600, 400)
-        
-        # Convert file path to URL format
-        pdf_url = QUrl.fromLocalFile(pdf_path)
-        
-        # Load PDF in the web view
-        self.web_view.load(pdf_url)
-        
-        # Connect load finished signal to check if PDF loaded successfully
-        self.web_view.loadFinished.connect(self.on_load_finished)
-        
-        # Add web view to layout with stretch to take up available space
-        layout.addWidget(self.web_view, 1)  # Stretch factor of 1
+        # The WebEngine view (and its Chromium process) is built on first show;
+        # until then a placeholder holds its place in the layout
+        self._placeholder = QtWidgets.QLabel("Loading…")
+        self._placeholder.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self._placeholder.setMinimumSize(600, 400)
+        layout.addWidget(self._placeholder, 1)  # Stretch factor of 1
         
         # Status label
         self.status_label = QtWidgets.QLabel("Loading PDF...")
         self.status_label.setMaximumHeight(30)
+        self.status_label.setStyleSheet(_STATUS_STYLE)
         layout.addWidget(self.status_label)
         
         # Button row
@@ -83,6 +77,42 @@ class PDFViewer(QtWidgets.QDialog):
         
         layout.addLayout(btn_layout)
     
+    def showEvent(self, event):
+        super().showEvent(event)
+        if WEBENGINE_AVAILABLE and not self._loaded:
+            QtCore.QTimer.singleShot(0, self._ensure_loaded)
+
+    def _ensure_loaded(self):
+        """Create the WebEngine page/view and start loading the PDF (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        # Create web engine page with proper settings
+        self.web_page = QWebEnginePage()
+        self.web_page.settings().setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
+        self.web_page.settings().setAttribute(QWebEngineSettings.WebAttribute.PdfViewerEnabled, True)
+        
+        # Web engine view for PDF display
+        self.web_view = QWebEngineView()
+        self.web_view.setPage(self.web_page)
+        
+        # Set minimum size for web view to ensure it's visible
+        self.web_view.setMinimumSize(600, 400)
+        
+        # Connect load finished signal to check if PDF loaded successfully
+        self.web_view.loadFinished.connect(self.on_load_finished)
+
+        # Swap the placeholder for the web view in one repaint
+        self.setUpdatesEnabled(False)
+        self.layout().replaceWidget(self._placeholder, self.web_view)
+        self._placeholder.deleteLater()
+        self._placeholder = None
+        self.setUpdatesEnabled(True)
+        
+        # Load PDF in the web view
+        self.web_view.load(QUrl.fromLocalFile(self.pdf_path))
+    
     def setup_fallback_view(self, pdf_path: str, layout: QtWidgets.QVBoxLayout):
         """Setup fallback PDF viewer using external application."""
         # Info label
@@ -135,16 +165,22 @@ class PDFViewer(QtWidgets.QDialog):
     def on_load_finished(self, success):
         """Handle when PDF load is finished."""
         if success:
-            self.status_label.setText("PDF loaded successfully")
-            self.status_label.setStyleSheet("color: green;")
+            self._set_status("PDF loaded successfully", "ok")
         else:
-            self.status_label.setText("Failed to load PDF")
-            self.status_label.setStyleSheet("color: red;")
+            self._set_status("Failed to load PDF", "error")
         
+    def _set_status(self, text: str, state: str = ""):
+        self.status_label.setText(text)
+        if self.status_label.property("state") != state:
+            self.status_label.setProperty("state", state)
+            self.status_label.style().polish(self.status_label)
+
     def reload_pdf(self):
         """Reload the PDF file."""
+        if WEBENGINE_AVAILABLE and not self._loaded:
+            self._ensure_loaded()
+            return
         if hasattr(self, 'web_view'):
-            self.status_label.setText("Reloading PDF...")
-            self.status_label.setStyleSheet("")
+            self._set_status("Reloading PDF...")
             pdf_url = QUrl.fromLocalFile(self.pdf_path)
             self.web_view.load(pdf_url)
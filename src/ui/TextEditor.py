@@ -1,3 +1,7 @@
+import codecs
+import io
+import mmap
+import os
 import sys
 from pathlib import Path
 
@@ -7,7 +11,187 @@ except Exception as e:
     print("[!] PyQt6 not installed. pip install PyQt6")
     sys.exit(1)
 
-from ui.constants import MESSAGE_COLORS, MESSAGE_BORDER_COLORS, MESSAGE_TEXT_COLORS
+from ui.constants import MESSAGE_STYLESHEETS
+
+# Files above this are memory-mapped and decoded straight from the mapping
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Text is handed to the editor in pieces of this many characters
+# (bytes of the mapping for large files)
+LOAD_CHUNK_SIZE = 256 * 1024
+# Chunks the loader may decode ahead of the editor inserting them
+LOAD_QUEUE_DEPTH = 2
+# Write buffer for saves
+SAVE_BUFFER_SIZE = 1 << 20
+# Bytes read from the head of a file to guess its encoding
+ENCODING_SAMPLE_SIZE = 4096
+
+# (BOM, codec to read with, codec to write back with after the BOM).
+# Longest BOMs first: the UTF-32-LE BOM starts with the UTF-16-LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32', 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32', 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig', 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16', 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16', 'utf-16-be'),
+)
+
+
+def _detect_encoding(sample: bytes) -> str:
+    """Guess the encoding from the first bytes of a file.
+
+    BOMs and valid UTF-8 are taken as-is; anything else goes to cchardet or
+    charset-normalizer when installed, and latin-1 otherwise.
+    """
+    for bom, encoding, _ in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # The sample may end mid-character; only a real error rules UTF-8 out
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    encoding = None
+    try:
+        import cchardet
+        encoding = cchardet.detect(sample).get('encoding')
+    except ImportError:
+        try:
+            import charset_normalizer
+            best = charset_normalizer.from_bytes(sample).best()
+            encoding = best.encoding if best else None
+        except ImportError:
+            pass
+    if encoding:
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            pass
+    return 'latin-1'
+
+
+def _save_format(sample: bytes, encoding: str) -> tuple[str, bytes]:
+    """Codec and BOM that write text back the way the file was read.
+
+    The BOM-sniffing codecs would write native byte order on save; the file's
+    own order is kept instead.
+    """
+    for bom, _, save_encoding in _BOMS:
+        if sample.startswith(bom):
+            return save_encoding, bom
+    return encoding, b''
+
+
+def _detect_newline(sample: bytes, encoding: str) -> str:
+    """The line ending the file uses, judged from its first bytes."""
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample)
+    if '\r\n' in text:
+        return '\r\n'
+    if '\r' in text:
+        return '\r'
+    return '\n'
+
+
+def _iter_text(file_path: str, encoding: str | None = None):
+    """Yield a text file's contents in chunks, in its detected encoding.
+
+    Small files are read and decoded in one go. Large files are mmap'd and fed
+    slice by slice through an incremental decoder, so neither the raw bytes nor
+    the full decoded text is ever held in memory at once; _FileLoader bounds
+    how far it runs ahead of the editor. Newlines are normalised to '\\n' as
+    text-mode reads would.
+    """
+    with open(file_path, 'rb') as f:
+        if encoding is None:
+            encoding = _detect_encoding(f.read(ENCODING_SAMPLE_SIZE))
+            f.seek(0)
+        if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+            text = str(f.read(), encoding)
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            for start in range(0, len(text), LOAD_CHUNK_SIZE):
+                yield text[start:start + LOAD_CHUNK_SIZE]
+            return
+
+        # Handles multi-byte characters and \r\n pairs split across slices
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, len(mm), LOAD_CHUNK_SIZE):
+                chunk = decoder.decode(mm[start:start + LOAD_CHUNK_SIZE])
+                if chunk:
+                    yield chunk
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+class _LoaderSignals(QtCore.QObject):
+    chunk = QtCore.pyqtSignal(str)
+    detected = QtCore.pyqtSignal(str, bytes, str)  # save encoding, BOM, newline
+    restart = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal()
+    error = QtCore.pyqtSignal(str)
+
+
+class _LoadCancelled(Exception):
+    pass
+
+
+class _FileLoader(QtCore.QRunnable):
+    """Reads and decodes the file on a pool thread and streams it out in chunks.
+
+    Each chunk is a queued signal, so the GUI thread inserts one piece per event
+    and keeps painting and handling input while a large file fills in. At most
+    LOAD_QUEUE_DEPTH chunks are out at a time: the loader waits for the editor
+    to take one (chunk_taken) before decoding the next, so the decoded text
+    never piles up in the event queue.
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__()
+        self.file_path = file_path
+        self.signals = _LoaderSignals()
+        self._slots = QtCore.QSemaphore(LOAD_QUEUE_DEPTH)
+        self._cancelled = False
+
+    def chunk_taken(self):
+        self._slots.release()
+
+    def cancel(self):
+        """Stop loading: the editor is gone and will take no more chunks."""
+        self._cancelled = True
+        self._slots.release(LOAD_QUEUE_DEPTH)
+
+    def _emit_chunk(self, chunk: str):
+        self._slots.acquire()
+        if self._cancelled:
+            raise _LoadCancelled
+        self.signals.chunk.emit(chunk)
+
+    def run(self):
+        try:
+            with open(self.file_path, 'rb') as f:
+                sample = f.read(ENCODING_SAMPLE_SIZE)
+            encoding = _detect_encoding(sample)
+            newline = _detect_newline(sample, encoding)
+            self.signals.detected.emit(*_save_format(sample, encoding), newline)
+            try:
+                for chunk in _iter_text(self.file_path, encoding):
+                    self._emit_chunk(chunk)
+            except UnicodeDecodeError:
+                # The file went bad past the sampled head: start over as latin-1
+                self.signals.restart.emit()
+                self.signals.detected.emit('latin-1', b'', newline)
+                for chunk in _iter_text(self.file_path, 'latin-1'):
+                    self._emit_chunk(chunk)
+        except _LoadCancelled:
+            return
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.finished.emit()
+
 
 class TextEditor(QtWidgets.QDialog):
     # Signal to notify when file is saved
@@ -21,8 +205,13 @@ class TextEditor(QtWidgets.QDialog):
         layout = QtWidgets.QVBoxLayout(self)
         
         # Text editor
-        self.text_edit = QtWidgets.QTextEdit()
+        # Plain-text document: flat line blocks, far cheaper than QTextEdit's rich text
+        self.text_edit = QtWidgets.QPlainTextEdit()
         self.text_edit.setFont(QtGui.QFont("Consolas", 10))
+        # No soft wrapping: each block lays out as one line, so long lines in big
+        # files don't force re-wrapping of the document on every resize
+        self.text_edit.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text_edit.setCenterOnScroll(False)
         layout.addWidget(self.text_edit)
         
         # Status message area
@@ -31,30 +220,15 @@ class TextEditor(QtWidgets.QDialog):
         self.status_label.setStyleSheet("padding: 8px; border: 1px solid #ccc; background-color: #f0f0f0; border-radius: 4px;")
         self.status_label.setMinimumHeight(30)
         self.status_label.setVisible(False)
+        self._last_msg_type = None
         layout.addWidget(self.status_label)
         
-        # Load file content
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.text_edit.setPlainText(content)
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
-                self.text_edit.setPlainText(content)
-            except Exception as e:
-                self.text_edit.setPlainText(f"Error reading file: {str(e)}")
-        except Exception as e:
-            self.text_edit.setPlainText(f"Error reading file: {str(e)}")
-        
         # Button row
         btn_layout = QtWidgets.QHBoxLayout()
         
-        save_btn = QtWidgets.QPushButton("Save")
-        save_btn.clicked.connect(self.save_file)
-        btn_layout.addWidget(save_btn)
+        self.save_btn = QtWidgets.QPushButton("Save")
+        self.save_btn.clicked.connect(self.save_file)
+        btn_layout.addWidget(self.save_btn)
         
         close_btn = QtWidgets.QPushButton("Close")
         close_btn.clicked.connect(self.close)
@@ -63,7 +237,55 @@ class TextEditor(QtWidgets.QDialog):
         layout.addLayout(btn_layout)
         
         self.file_path = file_path
-        self.original_content = self.text_edit.toPlainText()
+        # How the file is written back; set by the loader once it has looked
+        self._encoding = 'utf-8'
+        self._bom = b''
+        self._newline = '\n'
+
+        # Load file content on a worker so the dialog shows immediately;
+        # editing and saving stay off until the text is in place.
+        # Loading is not an edit: keep it out of the undo stack
+        self.text_edit.setPlaceholderText("Loading…")
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.save_btn.setEnabled(False)
+        self._load_cursor = QtGui.QTextCursor(self.text_edit.document())
+        self._loader = _FileLoader(file_path)
+        self._loader.signals.detected.connect(self._on_detected)
+        self._loader.signals.chunk.connect(self._on_chunk)
+        self._loader.signals.restart.connect(self.text_edit.clear)
+        self._loader.signals.finished.connect(self._on_loaded)
+        self._loader.signals.error.connect(self._on_load_error)
+        # Escape/reject and deletion don't pass through closeEvent
+        self.finished.connect(self._loader.cancel)
+        self.destroyed.connect(self._loader.cancel)
+        QtCore.QThreadPool.globalInstance().start(self._loader)
+
+    def _on_detected(self, encoding: str, bom: bytes, newline: str):
+        self._encoding = encoding
+        self._bom = bom
+        self._newline = newline
+
+    def _on_chunk(self, chunk: str):
+        self._load_cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+        self._load_cursor.insertText(chunk)
+        self._loader.chunk_taken()
+
+    def _on_loaded(self):
+        self._finish_loading()
+
+    def _on_load_error(self, message: str):
+        self.text_edit.setPlainText(f"Error reading file: {message}")
+        self._finish_loading()
+
+    def _finish_loading(self):
+        self._load_cursor = None
+        self.text_edit.setUndoRedoEnabled(True)
+        self.text_edit.setPlaceholderText("")
+        self.text_edit.setReadOnly(False)
+        self.save_btn.setEnabled(True)
+        # The document tracks edits itself; no copy of the original is kept
+        self.text_edit.document().setModified(False)
     
     def show_message(self, message: str, message_type: str = "info"):
         """Display a message in the status area.
@@ -72,16 +294,14 @@ class TextEditor(QtWidgets.QDialog):
             message: The message to display
             message_type: Type of message - "info", "warning", "error", "success"
         """
-        bg_color = MESSAGE_COLORS.get(message_type, MESSAGE_COLORS["info"])
-        border_color = MESSAGE_BORDER_COLORS.get(message_type, MESSAGE_BORDER_COLORS["info"])
-        text_color = MESSAGE_TEXT_COLORS.get(message_type, MESSAGE_TEXT_COLORS["info"])
+        if message_type not in MESSAGE_STYLESHEETS:
+            message_type = "info"
         
         self.status_label.setText(message)
-        self.status_label.setStyleSheet(
-            f"padding: 8px; border: 2px solid {border_color}; "
-            f"background-color: {bg_color}; color: {text_color}; "
-            f"border-radius: 4px; font-weight: bold;"
-        )
+        # Re-polishing is the costly part: only restyle when the type changes
+        if message_type != self._last_msg_type:
+            self.status_label.setStyleSheet(MESSAGE_STYLESHEETS[message_type])
+            self._last_msg_type = message_type
         self.status_label.setVisible(True)
         
         # Auto-hide success and info messages after 5 seconds
@@ -91,20 +311,48 @@ class TextEditor(QtWidgets.QDialog):
     def save_file(self):
         try:
             content = self.text_edit.toPlainText()
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Write back in the file's own encoding, BOM and line endings
+            text = content if self._newline == '\n' else content.replace('\n', self._newline)
+            fallback = None
+            try:
+                data = text.encode(self._encoding)
+            except UnicodeEncodeError:
+                # New text the old encoding can't hold: save as UTF-8 rather than
+                # not at all. latin-1 is only ever a guess at some 8-bit encoding
+                fallback = "its 8-bit encoding" if self._encoding == 'latin-1' else self._encoding
+                self._encoding, self._bom = 'utf-8', b''
+                data = text.encode('utf-8')
+            # Encode once and write through a large buffer to a sibling temp file,
+            # then swap it in: a failed write never leaves a half-written file.
+            # No fsync: this is a scratch copy, the vault itself is updated separately
+            tmp_path = self.file_path + '.tmp'
+            try:
+                with open(tmp_path, 'wb', buffering=SAVE_BUFFER_SIZE) as f:
+                    f.write(self._bom)
+                    f.write(data)
+                os.replace(tmp_path, self.file_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
             
+            self.text_edit.document().setModified(False)
+
             # Emit signal to notify parent about the save
             self.file_saved.emit(self.file_path, content)
             
-            self.show_message("File saved successfully", "success")
+            if fallback:
+                self.show_message(f"File saved as UTF-8: the text no longer fits {fallback}", "warning")
+            else:
+                self.show_message("File saved successfully", "success")
         except Exception as e:
             self.show_message(f"Failed to save file: {str(e)}", "error")
     
     def closeEvent(self, event):
         # Check if content has changed
-        current_content = self.text_edit.toPlainText()
-        if current_content != self.original_content:
+        if self.text_edit.document().isModified():
             reply = QtWidgets.QMessageBox.question(
                 self, 
                 "Save Changes?", 
@@ -123,3 +371,5 @@ class TextEditor(QtWidgets.QDialog):
                 event.ignore()
         else:
             event.accept()
+        if event.isAccepted():
+            self._loader.cancel()
@@ -1,5 +1,9 @@
+import atexit
 import sys
 import os
+import shutil
+import tempfile
+from collections import OrderedDict
 from pathlib import Path
 
 try:
@@ -8,13 +12,95 @@ except Exception as e:
     print("[!] PyQt6 not installed. pip install PyQt6")
     sys.exit(1)
 
+# Slider/time label refresh interval while playing; positionChanged fires far more often
+POSITION_POLL_MS = 250
+# Temp copies kept for reopening the same video; least recently used go first
+VIDEO_CACHE_ENTRIES = 4
+
+# (source path, mtime_ns, size) -> temp copy, oldest first
+_VIDEO_CACHE: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+
+
+def _remove_quietly(path: str):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception:pass
+
+
+def _video_cache_key(video_path: str) -> tuple[str, int, int]:
+    st = os.stat(video_path)
+    return os.path.abspath(video_path), st.st_mtime_ns, st.st_size
+
+
+def _video_cache_get(key) -> str | None:
+    cached = _VIDEO_CACHE.get(key)
+    if cached is None:
+        return None
+    if not os.path.exists(cached):
+        del _VIDEO_CACHE[key]
+        return None
+    _VIDEO_CACHE.move_to_end(key)
+    return cached
+
+
+def _video_cache_put(key, tmpname: str):
+    old = _VIDEO_CACHE.pop(key, None)
+    if old is not None and old != tmpname:
+        _remove_quietly(old)
+    _VIDEO_CACHE[key] = tmpname
+    while len(_VIDEO_CACHE) > VIDEO_CACHE_ENTRIES:
+        _, evicted = _VIDEO_CACHE.popitem(last=False)
+        _remove_quietly(evicted)
+
+
+def _in_temp_dir(path: str) -> bool:
+    try:
+        temp_root = os.path.realpath(tempfile.gettempdir())
+        return os.path.commonpath([os.path.realpath(path), temp_root]) == temp_root
+    except ValueError:
+        return False  # different drives on Windows
+
+
+@atexit.register
+def _clear_video_cache():
+    while _VIDEO_CACHE:
+        _remove_quietly(_VIDEO_CACHE.popitem()[1])
+
+
+class _CopySignals(QtCore.QObject):
+    copied = QtCore.pyqtSignal(object, str)  # job, tmpname
+    failed = QtCore.pyqtSignal(object, str)  # job, tmpname
+
+
+class _TempCopier(QtCore.QRunnable):
+    """Copies the video to its temp path on a pool thread so the dialog opens at once."""
+
+    def __init__(self, src: str, dst: str, cache_key):
+        super().__init__()
+        self.src = src
+        self.dst = dst
+        self.cache_key = cache_key
+        self.signals = _CopySignals()
+
+    def run(self):
+        try:
+            # Contents only (no copystat); copyfile uses the OS fast path where one
+            # exists: sendfile on Linux, fcopyfile on macOS, CopyFile2 on Windows
+            shutil.copyfile(self.src, self.dst)
+        except Exception:
+            self.signals.failed.emit(self, self.dst)
+            return
+        self.signals.copied.emit(self, self.dst)
+
+
 class VideoPlayer(QtWidgets.QDialog):
-    def __init__(self, video_path: str, parent=None):
+    def __init__(self, video_path: str, parent=None, owns_path: bool = False):
         super().__init__(parent)
         self.setWindowTitle("Video Player")
         self.resize(800, 600)
         self.init_ui()
-        self.load_video(video_path)
+        self.load_video(video_path, owns_path)
 
     def init_ui(self):
         self.video_widget = QtMultimediaWidgets.QVideoWidget(self)
@@ -30,6 +116,8 @@ class VideoPlayer(QtWidgets.QDialog):
         self.media_player.setAudioOutput(self.audio_output)
 
         self._temp_copy_path = None
+        self._copy_job = None
+        self._closed = False
 
         self.play_button = QtWidgets.QPushButton("Play", self)
         self.pause_button = QtWidgets.QPushButton("Pause", self)
@@ -65,97 +153,177 @@ class VideoPlayer(QtWidgets.QDialog):
 
         self.setLayout(layout)
 
-        # Helpers
-        def ms_to_time(ms: int) -> str:
-            s = int(ms // 1000)
-            m = s // 60
-            s = s % 60
-            return f"{m:02d}:{s:02d}"
-
-        def update_time_label():
-            pos = int(self.media_player.position())
-            dur = int(self.media_player.duration())
-            self.time_label.setText(f"{ms_to_time(pos)} / {ms_to_time(dur if dur > 0 else 0)}")
-
-        def toggle_play():
-            state = self.media_player.playbackState()
-            playing = state == QtMultimedia.QMediaPlayer.PlaybackState.PlayingState
-            if playing:
-                self.media_player.pause()
-                self.play_button.setText("Play")
-            else:
-                self.media_player.play()
-                self.play_button.setText("Pause")
+        self._dur_str = self._ms_to_time(0)
 
         # Connect buttons
-        self.play_button.clicked.connect(toggle_play)
-        self.pause_button.clicked.connect(lambda: (self.media_player.pause(), self.play_button.setText("Play")))
-        self.stop_button.clicked.connect(lambda: (self.media_player.stop(), self.play_button.setText("Play")))
+        self.play_button.clicked.connect(self._toggle_play)
+        self.pause_button.clicked.connect(self._pause)
+        self.stop_button.clicked.connect(self._stop)
 
         # Slider interaction state
         self._slider_is_pressed = False
-        self.position_slider.sliderPressed.connect(lambda: setattr(self, '_slider_is_pressed', True))
-        self.position_slider.sliderMoved.connect(lambda p: self.time_label.setText(f"{ms_to_time(p)} / {ms_to_time(self.media_player.duration() if self.media_player.duration() > 0 else 0)}"))
-        def _on_slider_released():
-            pos = int(self.position_slider.value())
-            try:
-                self.media_player.setPosition(pos)
-            except Exception:
-                pass
-            setattr(self, '_slider_is_pressed', False)
-        self.position_slider.sliderReleased.connect(_on_slider_released)
+        self.position_slider.sliderPressed.connect(self._on_slider_pressed)
+        self.position_slider.sliderMoved.connect(self._on_slider_moved)
+        self.position_slider.sliderReleased.connect(self._on_slider_released)
 
         # Volume control
-        self.volume_slider.valueChanged.connect(lambda v: self.audio_output.setVolume(v / 100.0))
-
-        # Update UI from player signals
-        def _on_position_changed(p):
-            if not getattr(self, '_slider_is_pressed', False):
-                try:
-                    self.position_slider.setValue(int(p))
-                except Exception:
-                    pass
-            update_time_label()
-
-        def _on_duration_changed(d):
+        self.volume_slider.valueChanged.connect(self._on_volume_changed)
+
+        # Update UI from player signals; position is polled at POSITION_POLL_MS
+        # while playing instead of handled on every positionChanged
+        self._position_timer = QtCore.QTimer(self)
+        self._position_timer.setInterval(POSITION_POLL_MS)
+        self._position_timer.timeout.connect(self._poll_position)
+        self.media_player.playbackStateChanged.connect(self._on_playback_state_changed)
+        self.media_player.durationChanged.connect(self._on_duration_changed)
+        self.media_player.errorOccurred.connect(self._on_media_error)
+
+    @staticmethod
+    def _ms_to_time(ms: int) -> str:
+        s = int(ms // 1000)
+        m = s // 60
+        s = s % 60
+        return f"{m:02d}:{s:02d}"
+
+    def _update_time_label(self, pos: int):
+        # The duration half only changes on durationChanged; it is cached in _dur_str
+        self.time_label.setText(f"{self._ms_to_time(pos)} / {self._dur_str}")
+
+    def _toggle_play(self):
+        state = self.media_player.playbackState()
+        playing = state == QtMultimedia.QMediaPlayer.PlaybackState.PlayingState
+        if playing:
+            self.media_player.pause()
+            self.play_button.setText("Play")
+        else:
+            self.media_player.play()
+            self.play_button.setText("Pause")
+
+    def _pause(self):
+        self.media_player.pause()
+        self.play_button.setText("Play")
+
+    def _stop(self):
+        self.media_player.stop()
+        self.play_button.setText("Play")
+
+    def _on_slider_pressed(self):
+        self._slider_is_pressed = True
+
+    def _on_slider_moved(self, p: int):
+        self._update_time_label(p)
+
+    def _on_slider_released(self):
+        pos = int(self.position_slider.value())
+        try:
+            self.media_player.setPosition(pos)
+        except Exception:
+            pass
+        self._slider_is_pressed = False
+        self._on_position_changed(pos)
+
+    def _on_volume_changed(self, v: int):
+        self.audio_output.setVolume(v / 100.0)
+
+    def _on_position_changed(self, p: int):
+        if not self._slider_is_pressed:
             try:
-                self.position_slider.setRange(0, int(d))
+                self.position_slider.setValue(int(p))
             except Exception:
                 pass
-            update_time_label()
+        self._update_time_label(p)
 
-        self.media_player.positionChanged.connect(_on_position_changed)
-        self.media_player.durationChanged.connect(_on_duration_changed)
+    def _poll_position(self):
+        self._on_position_changed(self.media_player.position())
 
-    def load_video(self, video_path: str):
+    def _on_playback_state_changed(self, state):
+        if state == QtMultimedia.QMediaPlayer.PlaybackState.PlayingState:
+            self._position_timer.start()
+        else:
+            self._position_timer.stop()
+            # Show where playback came to rest (pause point, or 0 after stop)
+            self._poll_position()
+
+    def _on_duration_changed(self, d: int):
         try:
-            import shutil
-            import tempfile
-            try:
-                if self._temp_copy_path and os.path.exists(self._temp_copy_path):
-                    os.remove(self._temp_copy_path)
-            except Exception:pass
+            self.position_slider.setRange(0, int(d))
+        except Exception:
+            pass
+        self._dur_str = self._ms_to_time(d if d > 0 else 0)
+        self._update_time_label(self.media_player.position())
+
+    def load_video(self, video_path: str, owns_path: bool = False):
+        """Start playing video_path.
+
+        owns_path: the caller keeps video_path in place and unchanged until this
+        player closes (e.g. a freshly decrypted temp file), so it is played
+        directly. Files already under the temp directory are treated the same.
+        Anything else is copied to a temp file first so it can't change under
+        the player.
+        """
+        self._video_path = video_path
+        if owns_path or _in_temp_dir(video_path):
+            self._copy_job = None
+            self._temp_copy_path = video_path
+            self._play(video_path)
+            return
+        try:
+            key = _video_cache_key(video_path)
+            cached = _video_cache_get(key)
+            if cached is not None:
+                # Same file reopened: play the copy made last time
+                self._copy_job = None
+                self._temp_copy_path = cached
+                self._play(cached)
+                return
 
             suffix = Path(video_path).suffix
             fd, tmpname = tempfile.mkstemp(suffix=suffix)
             os.close(fd)
-            shutil.copy2(video_path, tmpname)
             self._temp_copy_path = tmpname
-            url = QtCore.QUrl.fromLocalFile(self._temp_copy_path)
-            self.media_player.setSource(url)
-            self.media_player.play()
+            # Playback starts once the worker has finished the copy
+            self._copy_job = _TempCopier(video_path, tmpname, key)
+            self._copy_job.signals.copied.connect(self._on_copied)
+            self._copy_job.signals.failed.connect(self._on_copy_failed)
+            QtCore.QThreadPool.globalInstance().start(self._copy_job)
         except Exception as e:
-            url = QtCore.QUrl.fromLocalFile(video_path)
-            self.media_player.setSource(url)
-            self.media_player.play()
+            self._play(video_path)
+
+    def _play(self, path: str):
+        url = QtCore.QUrl.fromLocalFile(path)
+        self.media_player.setSource(url)
+        self.media_player.play()
+
+    def _on_copied(self, job, tmpname: str):
+        # The cache owns the copy, even one superseded by a newer load_video()
+        # or finished after close: reopening that video will reuse it
+        _video_cache_put(job.cache_key, tmpname)
+        if job is not self._copy_job or self._closed:
+            return
+        self._copy_job = None
+        self._play(tmpname)
+
+    def _on_copy_failed(self, job, tmpname: str):
+        _remove_quietly(tmpname)
+        if job is not self._copy_job or self._closed:
+            return
+        self._copy_job = None
+        self._temp_copy_path = None
+        self._play(self._video_path)
 
     def closeEvent(self, event):
-        try:self.media_player.stop()
-        except Exception:pass
+        self._closed = True
+        self._position_timer.stop()
         try:
-            if self._temp_copy_path and os.path.exists(self._temp_copy_path):
-                os.remove(self._temp_copy_path)
+            self.media_player.errorOccurred.disconnect(self._on_media_error)
+        except (TypeError, RuntimeError):
+            pass
+        try:
+            self.media_player.stop()
+            # Release the file so the caller can delete it
+            self.media_player.setSource(QtCore.QUrl())
         except Exception:pass
+        # Temp copies stay in _VIDEO_CACHE; they are removed on eviction or exit
         return super().closeEvent(event)
 
     def _on_media_error(self, err, err_str):
@@ -167,9 +335,3 @@ class VideoPlayer(QtWidgets.QDialog):
         except Exception:
             pass
 
-    def __del__(self):
-        try:
-            self.media_player.errorOccurred.disconnect(self._on_media_error)
-        except Exception:
-            pass
-
@@ -1,14 +1,51 @@
 import argparse
+import importlib
 
-from ui.gui import cmd_gui
-from utils.core import cmd_add, cmd_ls, cmd_extract, cmd_init
-from utils.dataModels import DEFAULT_T_COST, DEFAULT_M_COST_KiB, DEFAULT_PARALLELISM
-from utils.maintain import cmd_rename, cmd_rm, cmd_rotate_master
+from utils.constants import DEFAULT_T_COST, DEFAULT_M_COST_KiB, DEFAULT_PARALLELISM
 
-def build_parser() -> argparse.ArgumentParser:
+# Read-only commands scripts call in loops; efs.py builds a parser with only these
+FAST_COMMANDS = ("ls", "extract")
+
+
+def _lazy(module: str, name: str):
+    """Command handler that imports its module only when the subcommand runs.
+
+    Building the parser (and --help) then never loads the crypto stack, and
+    PyQt6 and the viewers are only imported when the GUI is actually launched.
+    """
+    def run(args: argparse.Namespace) -> None:
+        getattr(importlib.import_module(module), name)(args)
+    return run
+
+
+def _add_ls(sub) -> None:
+    p_ls = sub.add_parser("ls", help="List files (after unlock)")
+    p_ls.add_argument("repo", help="Path to repo directory")
+    p_ls.add_argument("--passphrase", required=True)
+    p_ls.set_defaults(func=_lazy("utils.core", "cmd_ls"))
+
+
+def _add_extract(sub) -> None:
+    p_ext = sub.add_parser("extract", help="Decrypt a file by id")
+    p_ext.add_argument("repo", help="Path to repo directory")
+    p_ext.add_argument("id", help="File id (UUID)")
+    p_ext.add_argument("out", help="Output plaintext path")
+    p_ext.add_argument("--passphrase", required=True)
+    p_ext.set_defaults(func=_lazy("utils.core", "cmd_extract"))
+
+
+def build_parser(only: str | None = None) -> argparse.ArgumentParser:
+    """Full CLI parser; with only="ls"/"extract", just that subcommand (fast path)."""
     p = argparse.ArgumentParser(description="Encrypted File System (GitHub-ready, opaque vault)")
     sub = p.add_subparsers(dest="cmd", required=True)
 
+    if only == "ls":
+        _add_ls(sub)
+        return p
+    if only == "extract":
+        _add_extract(sub)
+        return p
+
     p_init = sub.add_parser("init", help="Initialize vault")
     p_init.add_argument("repo", help="Path to repo directory")
     p_init.add_argument("--passphrase", required=True)
@@ -16,39 +53,32 @@ def build_parser() -> argparse.ArgumentParser:
     p_init.add_argument("-m", type=int, default=DEFAULT_M_COST_KiB, help=f"Argon2 memory (KiB), DEFAULT={DEFAULT_M_COST_KiB}")
     p_init.add_argument("-p", type=int, default=DEFAULT_PARALLELISM, help=f"Argon2 parallelism, DEFAULT={DEFAULT_PARALLELISM}")
     p_init.add_argument("--force", action="store_true", help="Overwrite existing vault.enc if present")
-    p_init.set_defaults(func=cmd_init)
+    p_init.add_argument("--calibrate", action="store_true", help="Tune -t/-m/-p to this machine (overrides them)")
+    p_init.add_argument("--target-ms", type=int, default=500, help="Unlock time to aim for with --calibrate, DEFAULT=500")
+    p_init.set_defaults(func=_lazy("utils.core", "cmd_init"))
 
-    p_add = sub.add_parser("add", help="Add a file (encrypt)")
+    p_add = sub.add_parser("add", help="Add one or more files (encrypt)")
     p_add.add_argument("repo", help="Path to repo directory")
-    p_add.add_argument("path", help="Plaintext file to add")
-    p_add.add_argument("--relpath", help="Relative path to preserve folder structure", required=False)
+    p_add.add_argument("paths", nargs="+", help="Plaintext file(s) to add; the vault is unlocked and written once")
+    p_add.add_argument("--relpath", help="Relative path to preserve folder structure (single file only)", required=False)
     p_add.add_argument("--passphrase", required=True)
-    p_add.set_defaults(func=cmd_add)
+    p_add.set_defaults(func=_lazy("utils.core", "cmd_add_batch"))
 
-    p_ls = sub.add_parser("ls", help="List files (after unlock)")
-    p_ls.add_argument("repo", help="Path to repo directory")
-    p_ls.add_argument("--passphrase", required=True)
-    p_ls.set_defaults(func=cmd_ls)
-
-    p_ext = sub.add_parser("extract", help="Decrypt a file by id")
-    p_ext.add_argument("repo", help="Path to repo directory")
-    p_ext.add_argument("id", help="File id (UUID)")
-    p_ext.add_argument("out", help="Output plaintext path")
-    p_ext.add_argument("--passphrase", required=True)
-    p_ext.set_defaults(func=cmd_extract)
+    _add_ls(sub)
+    _add_extract(sub)
 
-    p_rm = sub.add_parser("rm", help="Remove a file by id")
+    p_rm = sub.add_parser("rm", help="Remove one or more files by id")
     p_rm.add_argument("repo", help="Path to repo directory")
-    p_rm.add_argument("id", help="File id (UUID)")
+    p_rm.add_argument("ids", nargs="+", help="File id(s) (UUID); the vault is unlocked and written once")
     p_rm.add_argument("--passphrase", required=True)
-    p_rm.set_defaults(func=cmd_rm)
+    p_rm.set_defaults(func=_lazy("utils.maintain", "cmd_rm_batch"))
 
     p_ren = sub.add_parser("rename", help="Rename a file entry")
     p_ren.add_argument("repo", help="Path to repo directory")
     p_ren.add_argument("id", help="File id (UUID)")
     p_ren.add_argument("name", help="New name")
     p_ren.add_argument("--passphrase", required=True)
-    p_ren.set_defaults(func=cmd_rename)
+    p_ren.set_defaults(func=_lazy("utils.maintain", "cmd_rename"))
 
     p_rot = sub.add_parser("rotate-master", help="Rotate/Change master key and/or Argon2 params")
     p_rot.add_argument("repo", help="Path to repo directory")
@@ -57,12 +87,17 @@ def build_parser() -> argparse.ArgumentParser:
     p_rot.add_argument("-t", type=int, help="New Argon2 time cost (iterations)")
     p_rot.add_argument("-m", type=int, help="New Argon2 memory (KiB)")
     p_rot.add_argument("-p", type=int, help="New Argon2 parallelism")
-    p_rot.set_defaults(func=cmd_rotate_master)
+    p_rot.set_defaults(func=_lazy("utils.maintain", "cmd_rotate_master"))
 
+    p_cal = sub.add_parser("calibrate", help="Suggest Argon2 params for this machine")
+    p_cal.add_argument("--target-ms", type=int, default=500, help="Unlock time to aim for, DEFAULT=500")
+    p_cal.add_argument("-m", type=int, help="Argon2 memory (KiB), DEFAULT=min(RAM/4, 1 GiB)")
+    p_cal.add_argument("-p", type=int, help="Argon2 parallelism, DEFAULT=physical cores")
+    p_cal.set_defaults(func=_lazy("utils.maintain", "cmd_calibrate"))
 
     p_gui = sub.add_parser("gui", help="Launch minimal GUI")
     p_gui.add_argument("repo", nargs="?", help="Path to repo directory (optional)")
-    p_gui.set_defaults(func=cmd_gui)
+    p_gui.set_defaults(func=_lazy("ui.gui", "cmd_gui"))
 
     return p
 
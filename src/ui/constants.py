@@ -21,3 +21,13 @@ MESSAGE_TEXT_COLORS = {
     "error": "#b71c1c",     # Dark red
     "success": "#1b5e20"    # Dark green
 }
+
+# Full status-label stylesheets per message type, built once
+MESSAGE_STYLESHEETS = {
+    kind: (
+        f"padding: 8px; border: 2px solid {MESSAGE_BORDER_COLORS[kind]}; "
+        f"background-color: {MESSAGE_COLORS[kind]}; color: {MESSAGE_TEXT_COLORS[kind]}; "
+        f"border-radius: 4px; font-weight: bold;"
+    )
+    for kind in MESSAGE_COLORS
+}
@@ -2,10 +2,13 @@ import argparse
 import sys
 from pathlib import Path
 
+from crypto.aead import clear_key_cache
+
 # Import modular GUI components
 from ui.gui_components.dialogs import show_startup_dialog, show_change_master_password_dialog
 from ui.gui_components.tree_operations import (
-    populate_tree, filter_tree_items, set_descendants_checked,
+    populate_tree, filter_tree_items,
+    insert_tree_items, update_tree_item, remove_tree_items,
     select_all_items, deselect_all_items, get_selected_files,
     handle_tree_item_clicked
 )
@@ -13,11 +16,15 @@ from ui.gui_components.file_operations import (
     add_single_file, add_folder, remove_selected_files,
     open_file_viewer, extract_selected_files
 )
+from ui.gui_components.vault_model import VaultFileModel
 from ui.gui_components.vault_operations import (
     unlock_vault, lock_vault, close_repository,
     change_master_password, save_text_file_to_vault
 )
-from ui.constants import MESSAGE_COLORS, MESSAGE_BORDER_COLORS, MESSAGE_TEXT_COLORS
+from ui.constants import MESSAGE_STYLESHEETS
+
+# Quiet time after the last keystroke before the search filter runs
+FILTER_DEBOUNCE_MS = 150
 
 def cmd_gui(args: argparse.Namespace) -> None:
     try:
@@ -65,6 +72,11 @@ def cmd_gui(args: argparse.Namespace) -> None:
             # Search bar
             self.search_edit = QtWidgets.QLineEdit()
             self.search_edit.setPlaceholderText("Search files...")
+            # Typing restarts the timer, so a burst of keystrokes filters once
+            self._filter_timer = QtCore.QTimer(self)
+            self._filter_timer.setSingleShot(True)
+            self._filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+            self._filter_timer.timeout.connect(self._do_filter)
             self.search_edit.textChanged.connect(self.filter_files)
             self.search_edit.setEnabled(False)
             select_layout.addWidget(self.search_edit)
@@ -82,20 +94,28 @@ def cmd_gui(args: argparse.Namespace) -> None:
             select_layout.addStretch()
             layout.addLayout(select_layout)
 
-            # Tree for folders/files
-            self.tree = QtWidgets.QTreeWidget()
-            self.tree.setColumnCount(5)
-            self.tree.setHeaderLabels(["Select", "ID", "Name", "Size", "Relpath"])
-            self.tree.header().setStretchLastSection(True)
+            # Tree for folders/files: a view over the flat arrays of VaultFileModel
+            self.tree = QtWidgets.QTreeView()
+            self.tree.setModel(VaultFileModel(self.tree))
+            # Every row is one line of text: with uniform heights the view sizes
+            # rows from the first one instead of asking each row for its size hint
+            self.tree.setUniformRowHeights(True)
+            header = self.tree.header()
+            # Columns keep the widths set here (or dragged by the user); nothing
+            # measures cell contents across the whole vault
+            header.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Interactive)
+            header.setStretchLastSection(True)
             # Ensure checkbox column is wide enough for nested items
             try:
                 self.tree.setColumnWidth(0, 100)
+                # IDs are UUIDs: fixed-length, so their width is known up front
+                self.tree.setColumnWidth(1, self.tree.fontMetrics().horizontalAdvance("0" * 36) + 12)
             except Exception:
                 pass
             # Only allow single visual selection in the tree; checkbox column is used for multi-select
             self.tree.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
             # Clicking a row (not the checkbox) should select that single item via its checkbox
-            self.tree.itemClicked.connect(self._on_tree_item_clicked)
+            self.tree.clicked.connect(self._on_tree_item_clicked)
             layout.addWidget(self.tree)
 
             # Actions
@@ -143,13 +163,18 @@ def cmd_gui(args: argparse.Namespace) -> None:
             self.status_label.setStyleSheet("padding: 8px; border: 1px solid #ccc; background-color: #f0f0f0; border-radius: 4px;")
             self.status_label.setMinimumHeight(40)
             self.status_label.setVisible(False)
+            self._last_msg_type = None
             layout.addWidget(self.status_label)
 
             self.inner = None
             self.kmaster = None
+            self.kdf = None                     # KDF header from unlock, for saving with the held key
             self.current_editor = None
             self.current_file_id = None
-            self._last_clicked_item = None      # track last clicked item to support Shift+click range selection
+            self._last_clicked_node = None      # track last clicked node to support Shift+click range selection
+            self._extract_cache_dir = None      # per-session directory for opened files, made on first open
+            self._extract_cache = {}            # fid -> (blob mtime_ns, extracted path)
+            self._vault_saves = {}              # fid of a save in flight -> file to save next, if queued
 
         def show_message(self, message: str, message_type: str = "info"):
             """Display a message in the status area.
@@ -158,16 +183,14 @@ def cmd_gui(args: argparse.Namespace) -> None:
                 message: The message to display
                 message_type: Type of message - "info", "warning", "error", "success"
             """
-            bg_color = MESSAGE_COLORS.get(message_type, MESSAGE_COLORS["info"])
-            border_color = MESSAGE_BORDER_COLORS.get(message_type, MESSAGE_BORDER_COLORS["info"])
-            text_color = MESSAGE_TEXT_COLORS.get(message_type, MESSAGE_TEXT_COLORS["info"])
+            if message_type not in MESSAGE_STYLESHEETS:
+                message_type = "info"
             
             self.status_label.setText(message)
-            self.status_label.setStyleSheet(
-                f"padding: 8px; border: 2px solid {border_color}; "
-                f"background-color: {bg_color}; color: {text_color}; "
-                f"border-radius: 4px; font-weight: bold;"
-            )
+            # Same type as the last message: keep the stylesheet, skip the re-polish
+            if message_type != self._last_msg_type:
+                self.status_label.setStyleSheet(MESSAGE_STYLESHEETS[message_type])
+                self._last_msg_type = message_type
             self.status_label.setVisible(True)
             
             # Auto-hide success and info messages after 5 seconds
@@ -183,30 +206,22 @@ def cmd_gui(args: argparse.Namespace) -> None:
                 self.show_message("Please select a repository first", "warning")
                 return
             
-            pw = self.pass_edit.text()
-            result = unlock_vault(self, self.repo, pw, self.populate)
-            if result[0] is not None:
-                self.inner, self.kmaster = result
+            unlock_vault(self, self.repo, self.pass_edit.text(), self.populate)
 
         def populate(self):
-            populate_tree(self.tree, self.inner, self.__set_descendants_checked)
+            populate_tree(self.tree, self.inner)
 
         def filter_files(self):
+            """Schedule filtering of tree items (debounced)."""
+            self._filter_timer.start()
+
+        def _do_filter(self):
             """Filter tree items based on search text."""
             filter_tree_items(self.tree, self.search_edit.text())
 
-        def __set_descendants_checked(self, item: 'QtWidgets.QTreeWidgetItem', checked: bool) -> None:
-            set_descendants_checked(self.tree, item, checked)
-
-        def _clear_all_checkboxes(self) -> None:
-            from ui.gui_components.tree_operations import clear_all_checkboxes
-            clear_all_checkboxes(self.tree)
-
-        def _on_tree_item_clicked(self, item: 'QtWidgets.QTreeWidgetItem', column: int) -> None:
+        def _on_tree_item_clicked(self, index: 'QtCore.QModelIndex') -> None:
             """Handle clicks on tree rows for selection."""
-            self._last_clicked_item = handle_tree_item_clicked(
-                self.tree, item, column, self._last_clicked_item, self.__set_descendants_checked
-            )
+            self._last_clicked_node = handle_tree_item_clicked(self.tree, index, self._last_clicked_node)
 
         def select_all(self):
             """Select all files in the table."""
@@ -221,19 +236,19 @@ def cmd_gui(args: argparse.Namespace) -> None:
             return get_selected_files(self.tree)
 
         def add_file(self):
-            result = add_single_file(self, self.repo, self.pass_edit.text(), self.populate)
-            if result[0] is not None:
-                self.inner, self.kmaster = result
+            add_single_file(self, self.repo, self.inner, self.kmaster, self.kdf, self._on_files_added)
 
         def add_folder(self):
-            result = add_folder(self, self.repo, self.pass_edit.text(), self.populate)
-            if result[0] is not None:
-                self.inner, self.kmaster = result
+            add_folder(self, self.repo, self.inner, self.kmaster, self.kdf, self._on_files_added)
+
+        def _on_files_added(self, files):
+            insert_tree_items(self.tree, files)
 
         def remove_files(self):
-            result = remove_selected_files(self, self.repo, self.pass_edit.text(), self.get_selected_files(), self.populate)
-            if result[0] is not None:
-                self.inner, self.kmaster = result
+            remove_selected_files(self, self.repo, self.inner, self.kmaster, self.kdf, self.get_selected_files(), self._on_files_removed)
+
+        def _on_files_removed(self, file_ids):
+            remove_tree_items(self.tree, file_ids)
 
         def close_repo(self):
             """Close the currently opened repository and clear UI state."""
@@ -245,21 +260,32 @@ def cmd_gui(args: argparse.Namespace) -> None:
 
         def on_text_file_saved(self, file_path: str, content: str):
             """Handle when a text file is saved in the editor."""
-            result = save_text_file_to_vault(self, self.repo, self.current_file_id, content, self.pass_edit.text(), self.populate)
-            if result[0] is not None:
-                self.inner, self.kmaster = result
+            # The blob is rewritten: the next open decrypts it afresh
+            self._extract_cache.pop(self.current_file_id, None)
+            save_text_file_to_vault(self, self.repo, self.inner, self.kmaster, self.kdf, self.current_file_id, file_path, self._on_file_updated)
+
+        def _on_file_updated(self, entry):
+            update_tree_item(self.tree, entry)
 
         def open_file(self):
-            open_file_viewer(self, self.repo, self.pass_edit.text(), self.get_selected_files(), 
+            open_file_viewer(self, self.repo, self.inner, self.kmaster, self.get_selected_files(), 
                            lambda fid: setattr(self, 'current_file_id', fid), self.on_text_file_saved)
 
         def extract_selected(self):
-            extract_selected_files(self, self.repo, self.pass_edit.text(), self.get_selected_files())
+            extract_selected_files(self, self.repo, self.inner, self.kmaster, self.get_selected_files())
+
+        def closeEvent(self, event):
+            # Drop the held master key and its cached cipher with the window
+            self.inner = None
+            self.kmaster = None
+            self.kdf = None
+            clear_key_cache()
+            super().closeEvent(event)
 
         def change_master_password(self):
             curr, newp, confirmed = show_change_master_password_dialog(self)
             if confirmed:
-                change_master_password(self, self.repo, curr, newp, self.unlock)
+                change_master_password(self, self.repo, curr, newp, self.populate)
 
     app = QtWidgets.QApplication(sys.argv)
     
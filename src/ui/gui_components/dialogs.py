@@ -56,8 +56,7 @@ def create_new_repo(parent_window, parent_dialog):
         parent_dialog: The startup dialog to close on success
     """
     # Get directory for new repo
-    dlg = QtWidgets.QFileDialog(parent_window)
-    repo_dir = dlg.getExistingDirectory(parent_window, "Select directory for new repository")
+    repo_dir = QtWidgets.QFileDialog.getExistingDirectory(parent_window, "Select directory for new repository")
     if not repo_dir:
         return
     
@@ -126,8 +125,7 @@ def select_existing_repo(parent_window, parent_dialog):
         parent_window: The parent VaultApp window
         parent_dialog: The startup dialog to close on success
     """
-    dlg = QtWidgets.QFileDialog(parent_window)
-    repo_dir = dlg.getExistingDirectory(parent_window, "Select repository directory")
+    repo_dir = QtWidgets.QFileDialog.getExistingDirectory(parent_window, "Select repository directory")
     if not repo_dir:
         return
     
@@ -1,104 +1,133 @@
 """File operations for the GUI application."""
-import argparse
+import atexit
+import functools
 import mimetypes
 import os
+import shutil
 import sys
 import tempfile
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
-    from PyQt6 import QtWidgets, QtCore
+    from PyQt6 import QtWidgets
 except ImportError:
     pass
 
-from utils.core import unlock, cmd_extract, cmd_add, update_file_in_vault, prepare_file_add
-from crypto.aead import aead_encrypt
-from storage.vault import save_vault
-from utils.helper import repo_paths
-from ui.ImageViewer import ImageViewer
-from ui.TextEditor import TextEditor
-from ui.PDFViewer import PDFViewer
-from ui.VideoPlayer import VideoPlayer
-from ui.AudioPlayer import AudioPlayer
+from utils.core import prepare_file_add, extract_file, extract_file_bytes, save_inner
+from ui.gui_components.workers import run_in_background
 
 
-def add_single_file(parent_window, repo, passphrase, populate_callback):
+@functools.lru_cache(maxsize=256)
+def _mime_for_ext(ext):
+    return mimetypes.guess_type("f" + ext)[0]
+
+
+def _guess_mime(name):
+    """MIME type for a file name, memoized per extension (a vault has few distinct ones)."""
+    return _mime_for_ext(os.path.splitext(name)[1].lower())
+
+
+def add_single_file(parent_window, repo, inner, kmaster, kdf, added_callback):
     """Add a single file to the vault.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
-        passphrase: Master passphrase
-        populate_callback: Function to call to refresh the file list
-        
-    Returns:
-        tuple: (inner_metadata, kmaster) on success, (None, None) on failure
+        inner: Unlocked vault metadata, updated in place
+        kmaster: Master key held since unlock
+        kdf: KDF header parameters returned by unlock
+        added_callback: Function called with the added file entries to update the file list
     """
     if not repo:
         parent_window.show_message("Please select a repository first", "warning")
-        return None, None
+        return
         
-    dlg = QtWidgets.QFileDialog(parent_window)
-    file_path, _ = dlg.getOpenFileName(parent_window, "Select file to add to vault")
+    file_path, _ = QtWidgets.QFileDialog.getOpenFileName(parent_window, "Select file to add to vault")
     if not file_path:
-        return None, None
-    
-    try:
-        add_args = argparse.Namespace(
-            repo=str(repo),
-            path=file_path,
-            passphrase=passphrase
-        )
-        cmd_add(add_args)
-        
-        inner, kmaster, _ = unlock(repo, passphrase)
-        populate_callback()
-        
+        return
+
+    def on_encrypted(entry):
+        if parent_window.inner is not inner:
+            # Vault locked or closed meanwhile: the blob stays orphaned
+            return
+        parent_window.add_btn.setEnabled(True)
+        # The key is already held: no Argon2 run or metadata reload per add
+        file_dict = entry.to_dict()
+        inner.add(file_dict)
+        try:
+            save_inner(repo, inner, kmaster, kdf)
+        except Exception as e:
+            inner.remove(entry.id)
+            parent_window.show_message(f"Failed to add file: {str(e)}", "error")
+            return
+        added_callback([file_dict])
         parent_window.show_message(f"Added {Path(file_path).name} to vault", "success")
-        return inner, kmaster
-    except Exception as e:
+
+    def on_error(e):
+        if parent_window.inner is inner:
+            parent_window.add_btn.setEnabled(True)
         parent_window.show_message(f"Failed to add file: {str(e)}", "error")
-        return None, None
+
+    # Blob encryption runs on a pool thread; the metadata is merged back here
+    parent_window.add_btn.setEnabled(False)
+    parent_window.show_message(f"Adding {Path(file_path).name}…", "info")
+    run_in_background(prepare_file_add, repo, Path(file_path), None, kmaster,
+                      on_finished=on_encrypted, on_error=on_error)
 
 
-def add_folder(parent_window, repo, passphrase, populate_callback):
+def _iter_folder_files(folder_path):
+    """Yield (file_path, rel_path) for every file below folder_path.
+
+    Walks with os.scandir, whose entries carry the file type from the directory
+    listing: no stat per entry as rglob() + is_file() needs (symlinks excepted).
+    Symlinked directories are not descended into, as with rglob().
+    """
+    stack = [str(folder_path)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    file_path = Path(entry.path)
+                    # Calculate relative path from the selected folder
+                    yield file_path, file_path.relative_to(folder_path)
+
+
+def add_folder(parent_window, repo, inner, kmaster, kdf, added_callback):
     """Add a folder to the vault.
+
+    The blobs are encrypted on a pool thread (fanned out across cores); the
+    metadata is merged and saved back on the GUI thread once all are done.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
-        passphrase: Master passphrase
-        populate_callback: Function to call to refresh the file list
-        
-    Returns:
-        tuple: (inner_metadata, kmaster) on success, (None, None) on failure
+        inner: Unlocked vault metadata, updated in place
+        kmaster: Master key held since unlock
+        kdf: KDF header parameters returned by unlock
+        added_callback: Function called with the added file entries to update the file list
     """
     if not repo:
         parent_window.show_message("Please select a repository first", "warning")
-        return None, None
+        return
         
-    dlg = QtWidgets.QFileDialog(parent_window)
-    folder_path = dlg.getExistingDirectory(parent_window, "Select folder to add to vault")
+    folder_path = QtWidgets.QFileDialog.getExistingDirectory(parent_window, "Select folder to add to vault")
     if not folder_path:
-        return None, None
+        return
     
     folder_path = Path(folder_path)
     if not folder_path.is_dir():
         parent_window.show_message("Please select a valid folder", "warning")
-        return None, None
+        return
     
     # Get all files in the folder recursively
-    files_to_add = []
-    for file_path in folder_path.rglob('*'):
-        if file_path.is_file():
-            # Calculate relative path from the selected folder
-            rel_path = file_path.relative_to(folder_path)
-            files_to_add.append((file_path, rel_path))
+    files_to_add = list(_iter_folder_files(folder_path))
     
     if not files_to_add:
         parent_window.show_message("The selected folder contains no files", "info")
-        return None, None
+        return
     
     # Confirm with user
     file_list = "\n".join([f"• {rel_path}" for file_path, rel_path in files_to_add[:10]])  # Show first 10
@@ -113,112 +142,87 @@ def add_folder(parent_window, repo, passphrase, populate_callback):
         QtWidgets.QMessageBox.StandardButton.No
     )
     
-    if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-        progress = None
-        try:
-            # Unlock once to get inner, kmaster, and KDF params
-            inner, kmaster, kdf = unlock(repo, passphrase)
+    if reply != QtWidgets.QMessageBox.StandardButton.Yes:
+        return
 
-            success_entries = []
-            failed_files = []
+    # Prepare tasks: (file_path, prefixed_rel)
+    tasks = [(file_path, str(Path(folder_path.name) / rel_path)) for file_path, rel_path in files_to_add]
+
+    def encrypt_all():
+        success_entries = []
+        failed_files = []
+        # Thread pool equal to CPU cores
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as ex:
+            future_map = {ex.submit(prepare_file_add, repo, Path(file_path), relp, kmaster): relp
+                          for file_path, relp in tasks}
+            for fut in as_completed(future_map):
+                try:
+                    success_entries.append(fut.result())
+                except Exception as e:
+                    failed_files.append((future_map[fut], str(e)))
+        return success_entries, failed_files
 
-            # Progress dialog
-            progress = QtWidgets.QProgressDialog("Adding files to vault...", "Cancel", 0, len(files_to_add), parent_window)
-            progress.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
-            progress.setAutoClose(False)
+    def on_encrypted(result):
+        if parent_window.inner is not inner:
+            # Vault locked or closed meanwhile: the blobs stay orphaned
+            return
+        parent_window.add_folder_btn.setEnabled(True)
+        success_entries, failed_files = result
 
-            # Prepare tasks: (file_path, prefixed_rel)
-            tasks = [(file_path, str(Path(folder_path.name) / rel_path)) for file_path, rel_path in files_to_add]
+        # Merge entries and save vault once
+        added = [entry.to_dict() for entry in success_entries]
+        for file_dict in added:
+            inner.add(file_dict)
+        try:
+            save_inner(repo, inner, kmaster, kdf)
+        except Exception as e:
+            inner.remove_many(entry.id for entry in success_entries)
+            parent_window.show_message(f"Failed to add folder: {str(e)}", "error")
+            return
 
-            # Thread pool equal to CPU cores
-            max_workers = os.cpu_count() or 1
-            completed = 0
+        # Add just the new rows to the UI
+        added_callback(added)
 
-            with ThreadPoolExecutor(max_workers=max_workers) as ex:
-                future_map = {}
-                for file_path, relp in tasks:
-                    future = ex.submit(prepare_file_add, repo, Path(file_path), relp, kmaster)
-                    future_map[future] = (file_path, relp)
+        # Show results
+        success_count = len(success_entries)
+        if failed_files:
+            error_msg = f"Successfully added {success_count} files. Failed to add {len(failed_files)} files:\n"
+            error_msg += "\n".join([f"• {name}: {error}" for name, error in failed_files[:5]])
+            if len(failed_files) > 5:
+                error_msg += f"\n... and {len(failed_files) - 5} more failures"
+            parent_window.show_message(error_msg, "warning")
+        else:
+            parent_window.show_message(f"Added {success_count} files from '{folder_path.name}' to vault", "success")
 
-                for fut in as_completed(future_map):
-                    file_path, relp = future_map[fut]
-                    progress.setLabelText(f"Adding: {relp}")
-                    try:
-                        entry = fut.result()
-                        success_entries.append(entry)
-                    except Exception as e:
-                        failed_files.append((str(relp), str(e)))
-                    completed += 1
-                    progress.setValue(completed)
-                    if progress.wasCanceled():
-                        break
-
-            # If canceled, do not write partial metadata changes (blobs already written remain orphaned)
-            if progress.wasCanceled():
-                progress.close()
-                progress = None
-                parent_window.show_message("Folder add canceled. Some blobs may have been written.", "info")
-                return None, None
-            else:
-                # Merge entries and save vault once
-                for entry in success_entries:
-                    inner.files.append(entry.to_dict())
-                inner_bytes = inner.to_bytes()
-                new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-                p = repo_paths(repo)
-                save_vault(p["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
-
-                # Refresh UI state
-                inner, kmaster, _ = unlock(repo, passphrase)
-                populate_callback()
-
-                # Close progress dialog before showing result
-                progress.close()
-                progress = None
-
-                # Show results
-                success_count = len(success_entries)
-                if failed_files:
-                    error_msg = f"Successfully added {success_count} files. Failed to add {len(failed_files)} files:\n"
-                    error_msg += "\n".join([f"• {name}: {error}" for name, error in failed_files[:5]])
-                    if len(failed_files) > 5:
-                        error_msg += f"\n... and {len(failed_files) - 5} more failures"
-                    parent_window.show_message(error_msg, "warning")
-                else:
-                    parent_window.show_message(f"Added {success_count} files from '{folder_path.name}' to vault", "success")
-                
-                return inner, kmaster
+    def on_error(e):
+        if parent_window.inner is inner:
+            parent_window.add_folder_btn.setEnabled(True)
+        parent_window.show_message(f"Failed to add folder: {str(e)}", "error")
 
-        except Exception as e:
-            if progress:
-                progress.close()
-                progress = None
-            parent_window.show_message(f"Failed to add folder: {str(e)}", "error")
-            return None, None
-    
-    return None, None
+    parent_window.add_folder_btn.setEnabled(False)
+    parent_window.show_message(f"Adding {len(tasks)} files from '{folder_path.name}'…", "info")
+    run_in_background(encrypt_all, on_finished=on_encrypted, on_error=on_error)
 
 
-def remove_selected_files(parent_window, repo, passphrase, selected_files, populate_callback):
+def remove_selected_files(parent_window, repo, inner, kmaster, kdf, selected_files, removed_callback):
     """Remove selected files from the vault.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
-        passphrase: Master passphrase
+        inner: Unlocked vault metadata, updated in place
+        kmaster: Master key held since unlock
+        kdf: KDF header parameters returned by unlock
         selected_files: List of (file_id, name, relpath) tuples
-        populate_callback: Function to call to refresh the file list
-        
-    Returns:
-        tuple: (inner_metadata, kmaster) on success, (None, None) on failure
+        removed_callback: Function called with the removed file IDs to update the file list
     """
     if not repo:
         parent_window.show_message("Please select a repository first", "warning")
-        return None, None
+        return
         
     if not selected_files:
         parent_window.show_message("Please select files to remove", "warning")
-        return None, None
+        return
     
     # Confirm deletion
     file_list = "\n".join([f"• {name}" for fid, name, _ in selected_files])
@@ -232,9 +236,8 @@ def remove_selected_files(parent_window, repo, passphrase, selected_files, popul
     
     if reply == QtWidgets.QMessageBox.StandardButton.Yes:
         try:
-            # Unlock once and build id->entry map
-            inner, kmaster, kdf = unlock(repo, passphrase)
-            id_to_entry = {f["id"]: f for f in inner.files}
+            # inner.by_id is the id->entry map
+            id_to_entry = inner.by_id
 
             # Prepare tasks for parallel blob deletion
             targets = []  # (fid, blob_path)
@@ -246,18 +249,7 @@ def remove_selected_files(parent_window, repo, passphrase, selected_files, popul
 
             if not targets:
                 parent_window.show_message("Selected items not found in vault metadata", "warning")
-                return None, None
-
-            # Progress dialog
-            progress = QtWidgets.QProgressDialog("Removing files from vault...", None, 0, len(targets), parent_window)
-            progress.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
-            progress.setAutoClose(True)
-
-            # Thread pool sized to CPU cores
-            max_workers = os.cpu_count() or 1
-            completed = 0
-            success_ids = []
-            failed = []  # (fid, error)
+                return
 
             def _unlink_blob(path: Path):
                 try:
@@ -265,70 +257,93 @@ def remove_selected_files(parent_window, repo, passphrase, selected_files, popul
                 except FileNotFoundError:
                     # Treat missing blob as success for metadata cleanup
                     return
+
+            # Blobs are unlinked on a pool thread (fanned out across cores);
+            # metadata is updated and saved back on the GUI thread
+            def unlink_all():
+                success_ids = []
+                failed = []  # (fid, error)
+                with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as ex:
+                    future_map = {ex.submit(_unlink_blob, blob_path): fid for fid, blob_path in targets}
+                    for fut in as_completed(future_map):
+                        fid = future_map[fut]
+                        try:
+                            fut.result()
+                            success_ids.append(fid)
+                        except Exception as e:
+                            failed.append((fid, str(e)))
+                return success_ids, failed
+
+            def on_unlinked(result):
+                success_ids, failed = result
+                # Names for the report, before the entries leave the index
+                names = {fid: id_to_entry[fid].get("name", fid) for fid, _ in failed}
+                # The blobs are gone: the metadata is saved with the captured
+                # key even if the vault was locked or closed meanwhile, so
+                # vault.enc never lists entries without blobs
+                save_error = None
+                try:
+                    # Update metadata once for all successful deletions
+                    if success_ids:
+                        inner.remove_many(success_ids)
+                        save_inner(repo, inner, kmaster, kdf)
                 except Exception as e:
-                    raise e
+                    save_error = e
+                if parent_window.inner is not inner:
+                    # Vault locked or closed meanwhile: nothing to update on screen
+                    if save_error is not None:
+                        parent_window.show_message(f"Failed to remove files: {str(save_error)}", "error")
+                    return
+                parent_window.remove_btn.setEnabled(True)
+
+                # Drop just the removed rows from the UI. Their blobs are gone
+                # even if the save failed, so the rows go too; the held inner
+                # no longer lists them and the next save records that
+                removed_callback(success_ids)
+                if save_error is not None:
+                    parent_window.show_message(
+                        f"Removed {len(success_ids)} file(s), but saving the vault failed: {str(save_error)}. "
+                        "The removal is saved with the vault's next change.", "error")
+                    return
+
+                # Report outcome
+                if failed:
+                    msg = f"Removed {len(success_ids)} file(s). Failed to remove {len(failed)}:"
+                    # show up to 5 failures
+                    for fid, err in failed[:5]:
+                        msg += f"\n• {names[fid]}: {err}"
+                    if len(failed) > 5:
+                        msg += f"\n... and {len(failed) - 5} more"
+                    parent_window.show_message(msg, "warning")
+                else:
+                    parent_window.show_message(f"Removed {len(success_ids)} file(s) from vault", "success")
 
-            with ThreadPoolExecutor(max_workers=max_workers) as ex:
-                future_map = {}
-                for fid, blob_path in targets:
-                    future = ex.submit(_unlink_blob, blob_path)
-                    future_map[future] = (fid, blob_path)
+            def on_error(e):
+                if parent_window.inner is inner:
+                    parent_window.remove_btn.setEnabled(True)
+                parent_window.show_message(f"Failed to remove files: {str(e)}", "error")
 
-                for fut in as_completed(future_map):
-                    fid, blob_path = future_map[fut]
-                    progress.setLabelText(f"Removing: {id_to_entry.get(fid, {}).get('name', fid)}")
-                    try:
-                        fut.result()
-                        success_ids.append(fid)
-                    except Exception as e:
-                        failed.append((fid, str(e)))
-                    completed += 1
-                    progress.setValue(completed)
-
-            # Update metadata once for all successful deletions
-            if success_ids:
-                remaining = [f for f in inner.files if f["id"] not in success_ids]
-                inner.files = remaining
-                inner_bytes = inner.to_bytes()
-                new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-                p = repo_paths(repo)
-                save_vault(p["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
-
-            # Refresh UI
-            inner, kmaster, _ = unlock(repo, passphrase)
-            populate_callback()
-
-            # Report outcome
-            if failed:
-                msg = f"Removed {len(success_ids)} file(s). Failed to remove {len(failed)}:"
-                # show up to 5 failures
-                for fid, err in failed[:5]:
-                    name = id_to_entry.get(fid, {}).get("name", fid)
-                    msg += f"\n• {name}: {err}"
-                if len(failed) > 5:
-                    msg += f"\n... and {len(failed) - 5} more"
-                parent_window.show_message(msg, "warning")
-            else:
-                parent_window.show_message(f"Removed {len(success_ids)} file(s) from vault", "success")
-            
-            return inner, kmaster
+            parent_window.remove_btn.setEnabled(False)
+            parent_window.show_message(f"Removing {len(targets)} file(s) from vault…", "info")
+            run_in_background(unlink_all, on_finished=on_unlinked, on_error=on_error)
         except Exception as e:
             parent_window.show_message(f"Failed to remove files: {str(e)}", "error")
-            return None, None
-    
-    return None, None
 
 
-def open_file_viewer(parent_window, repo, passphrase, selected_files, current_file_id_setter, on_text_file_saved_callback):
+def open_file_viewer(parent_window, repo, inner, kmaster, selected_files, current_file_id_setter, on_text_file_saved_callback):
     """Open file viewers for the selected files using parallel extraction.
 
-    Multiple files are extracted concurrently via a thread pool and each
-    viewer is opened as a non-modal window so all can be used simultaneously.
+    Extraction runs off the GUI thread (several files concurrently via a thread
+    pool) and each viewer is opened as a non-modal window once it is done, so
+    all can be used simultaneously. Images are decrypted into memory and handed
+    to the viewer as bytes; other kinds go through the on-disk extract cache,
+    since their viewers (and the text editor's save) work on a file.
 
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
-        passphrase: Master passphrase
+        inner: Unlocked vault metadata
+        kmaster: Master key from the unlock
         selected_files: List of (file_id, name, relpath) tuples
         current_file_id_setter: Function to set the current file ID
         on_text_file_saved_callback: Callback for when text file is saved
@@ -349,38 +364,102 @@ def open_file_viewer(parent_window, repo, passphrase, selected_files, current_fi
     
     # Store current file ID for saving
     current_file_id_setter(fid)
-    
-    # Create temporary file for viewing
-    temp_dir = tempfile.mkdtemp()
-    temp_path = os.path.join(temp_dir, name)
 
-    # Extract a single file to a temp location (runs in a worker thread)
-    def extract_to_temp(fid_name_relpath):
+    # Files opened before and unchanged since (same blob mtime) are reused
+    # from the session's extract cache instead of being decrypted again
+    cache = parent_window._extract_cache
+    extracted = []
+    to_extract = []
+    for item in selected_files:
+        try:
+            mtime = os.stat(Path(repo) / inner.by_id[item[0]]["blob"]).st_mtime_ns
+        except (KeyError, OSError):
+            mtime = None
+        cached = cache.get(item[0])
+        if cached is not None and cached[0] == mtime and os.path.exists(cached[1]):
+            extracted.append((item[0], item[1], cached[1]))
+        else:
+            to_extract.append((item, mtime))
+
+    if not to_extract:
+        _show_viewers(parent_window, extracted, [], current_file_id_setter, on_text_file_saved_callback)
+        return
+
+    cache_dir = _extract_cache_dir(parent_window)
+
+    # Extract a single file into memory or the cache directory (runs in a worker thread)
+    def extract_to_cache(fid_name_relpath):
         fid, name, relpath = fid_name_relpath
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, name)
-        extract_args = argparse.Namespace(
-            repo=str(repo),
-            id=fid,
-            out=temp_path,
-            passphrase=passphrase
-        )
-        cmd_extract(extract_args)
-        return fid, name, temp_dir, temp_path
+        if (_guess_mime(name) or "").startswith("image/"):
+            return fid, name, extract_file_bytes(repo, inner, kmaster, fid)
+        file_dir = cache_dir / fid
+        file_dir.mkdir(exist_ok=True)
+        temp_path = str(file_dir / name)
+        extract_file(repo, inner, kmaster, fid, Path(temp_path))
+        return fid, name, temp_path
 
     # Extract all selected files in parallel
-    max_workers = min(len(selected_files), os.cpu_count() or 1)
-    extracted = []
-    failed = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        future_map = {ex.submit(extract_to_temp, item): item for item in selected_files}
-        for fut in as_completed(future_map):
-            item = future_map[fut]
-            try:
-                extracted.append(fut.result())
-            except Exception as e:
-                failed.append((item[1], str(e)))
+    def extract_all():
+        max_workers = min(len(to_extract), os.cpu_count() or 1)
+        done = []
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            future_map = {ex.submit(extract_to_cache, item): (item, mtime) for item, mtime in to_extract}
+            for fut in as_completed(future_map):
+                item, mtime = future_map[fut]
+                try:
+                    done.append((fut.result(), mtime))
+                except Exception as e:
+                    failed.append((item[1], str(e)))
+        return done, failed
+
+    def on_extracted(result):
+        done, failed = result
+        if parent_window.inner is not inner:
+            # Vault locked or closed meanwhile: show nothing, and drop any
+            # plaintext written after the extract cache was cleared
+            for entry, _ in done:
+                if isinstance(entry[2], str):
+                    Path(entry[2]).unlink(missing_ok=True)
+            return
+        parent_window.open_btn.setEnabled(True)
+        for entry, mtime in done:
+            # In-memory images are not cached
+            if isinstance(entry[2], str):
+                cache[entry[0]] = (mtime, entry[2])
+        _show_viewers(parent_window, extracted + [entry for entry, _ in done], failed,
+                      current_file_id_setter, on_text_file_saved_callback)
 
+    def on_error(e):
+        parent_window.open_btn.setEnabled(parent_window.inner is inner)
+        parent_window.show_message(f"Failed to open {name}: {str(e)}", "error")
+
+    parent_window.open_btn.setEnabled(False)
+    run_in_background(extract_all, on_finished=on_extracted, on_error=on_error)
+
+
+def _extract_cache_dir(parent_window):
+    """The session's directory for opened files, created on first use."""
+    if parent_window._extract_cache_dir is None:
+        cache_dir = Path(tempfile.mkdtemp(prefix="efs-view-"))
+        atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+        parent_window._extract_cache_dir = cache_dir
+    return parent_window._extract_cache_dir
+
+
+def clear_extract_cache(parent_window):
+    """Delete every file extracted for viewing (on lock/close: no plaintext stays behind)."""
+    parent_window._extract_cache.clear()
+    if parent_window._extract_cache_dir is not None:
+        shutil.rmtree(parent_window._extract_cache_dir, ignore_errors=True)
+        parent_window._extract_cache_dir = None
+
+
+def _show_viewers(parent_window, extracted, failed, current_file_id_setter, on_text_file_saved_callback):
+    """Open a viewer per extracted (fid, name, path or image bytes); report failures.
+
+    The files belong to the extract cache and outlive their viewers.
+    """
     if failed:
         error_msg = f"Failed to open {len(failed)} file(s):\n" + "\n".join(
             [f"• {n}: {e}" for n, e in failed[:5]]
@@ -394,19 +473,9 @@ def open_file_viewer(parent_window, repo, passphrase, selected_files, current_fi
         parent_window._open_viewers = []
 
     # Open a non-modal viewer for each successfully extracted file
-    for fid, name, temp_dir, temp_path in extracted:
+    for fid, name, source in extracted:
         try:
-            mime_type, _ = mimetypes.guess_type(name)
-
-            # Build closures that capture the correct paths / viewer for cleanup
-            def make_cleanup(tp, td):
-                def cleanup():
-                    try:
-                        os.remove(tp)
-                        os.rmdir(td)
-                    except Exception:
-                        pass
-                return cleanup
+            mime_type = _guess_mime(name)
 
             def make_remove_viewer(v):
                 def remove():
@@ -416,36 +485,40 @@ def open_file_viewer(parent_window, repo, passphrase, selected_files, current_fi
                         pass
                 return remove
 
-            cleanup = make_cleanup(temp_path, temp_dir)
-
+            # Viewer modules are imported on first use: QtWebEngine, QtMultimedia
+            # and the rest load only for someone who actually opens that kind of file
             if mime_type and mime_type.startswith('image/'):
+                from ui.ImageViewer import ImageViewer
                 # Use None as parent so the viewer is an independent top-level window
                 # and does not obscure the main file listing window.
-                viewer = ImageViewer(temp_path, None)
+                if isinstance(source, bytes):
+                    viewer = ImageViewer(name, None, data=source)
+                else:
+                    viewer = ImageViewer(source, None)
                 parent_window._open_viewers.append(viewer)
-                viewer.finished.connect(cleanup)
                 viewer.finished.connect(make_remove_viewer(viewer))
                 viewer.show()
             elif mime_type == 'application/pdf':
-                viewer = PDFViewer(temp_path, None)
+                from ui.PDFViewer import PDFViewer
+                viewer = PDFViewer(source, None)
                 parent_window._open_viewers.append(viewer)
-                viewer.finished.connect(cleanup)
                 viewer.finished.connect(make_remove_viewer(viewer))
                 viewer.show()
             elif mime_type and mime_type.startswith('video/'):
-                player = VideoPlayer(temp_path, None)
+                from ui.VideoPlayer import VideoPlayer
+                player = VideoPlayer(source, None, owns_path=True)
                 parent_window._open_viewers.append(player)
-                player.finished.connect(cleanup)
                 player.finished.connect(make_remove_viewer(player))
                 player.show()
             elif mime_type and mime_type.startswith('audio/'):
-                player = AudioPlayer(temp_path, None)
+                from ui.AudioPlayer import AudioPlayer
+                player = AudioPlayer(source, None)
                 parent_window._open_viewers.append(player)
-                player.finished.connect(cleanup)
                 player.finished.connect(make_remove_viewer(player))
                 player.show()
             else:
-                editor = TextEditor(temp_path, None)
+                from ui.TextEditor import TextEditor
+                editor = TextEditor(source, None)
                 parent_window._open_viewers.append(editor)
                 # Per-file save callback: set the correct file ID before saving
                 def make_text_save_callback(captured_fid):
@@ -454,26 +527,21 @@ def open_file_viewer(parent_window, repo, passphrase, selected_files, current_fi
                         on_text_file_saved_callback(file_path, content)
                     return callback
                 editor.file_saved.connect(make_text_save_callback(fid))
-                editor.finished.connect(cleanup)
                 editor.finished.connect(make_remove_viewer(editor))
                 editor.show()
 
         except Exception as e:
             QtWidgets.QMessageBox.critical(parent_window, "Error", f"Failed to open {name}: {str(e)}")
-            try:
-                os.remove(temp_path)
-                os.rmdir(temp_dir)
-            except Exception:
-                pass
 
 
-def extract_selected_files(parent_window, repo, passphrase, selected_files):
+def extract_selected_files(parent_window, repo, inner, kmaster, selected_files):
     """Extract selected files from the vault.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
-        passphrase: Master passphrase
+        inner: Unlocked vault metadata
+        kmaster: Master key from the unlock
         selected_files: List of (file_id, name, relpath) tuples
     """
     if not repo:
@@ -487,34 +555,59 @@ def extract_selected_files(parent_window, repo, passphrase, selected_files):
     if len(selected_files) == 1:
         # Single file - use save dialog
         fid, name, relpath = selected_files[0]
-        dlg = QtWidgets.QFileDialog(parent_window)
-        out, _ = dlg.getSaveFileName(parent_window, "Save decrypted file", name)
+        out, _ = QtWidgets.QFileDialog.getSaveFileName(parent_window, "Save decrypted file", name)
         if not out:
             return
         
-        try:
-            args = argparse.Namespace(repo=str(repo), id=fid, out=out, passphrase=passphrase)
-            cmd_extract(args)
-            parent_window.show_message(f"Saved to {out}", "success")
-        except Exception as e:
-            parent_window.show_message(str(e), "error")
+        message = f"Saved to {out}"
+
+        def extract_all():
+            extract_file(repo, inner, kmaster, fid, Path(out))
+            return []
     else:
         # Multiple files - use directory dialog
-        dlg = QtWidgets.QFileDialog(parent_window)
-        out_dir = dlg.getExistingDirectory(parent_window, "Select directory to save files")
+        out_dir = QtWidgets.QFileDialog.getExistingDirectory(parent_window, "Select directory to save files")
         if not out_dir:
             return
         
-        try:
-            success_count = 0
-            for fid, name, relpath in selected_files:
-                # Recreate folder structure when extracting many
-                out_path = Path(out_dir) / (relpath or name)
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                args = argparse.Namespace(repo=str(repo), id=fid, out=str(out_path), passphrase=passphrase)
-                cmd_extract(args)
-                success_count += 1
-            
-            parent_window.show_message(f"Extracted {success_count} files to {out_dir}", "success")
-        except Exception as e:
-            parent_window.show_message(str(e), "error")
+        message = f"Extracted {len(selected_files)} files to {out_dir}"
+
+        def extract_one(fid_name_relpath):
+            fid, name, relpath = fid_name_relpath
+            # Recreate folder structure when extracting many
+            out_path = Path(out_dir) / (relpath or name)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            extract_file(repo, inner, kmaster, fid, out_path)
+
+        # Files are decrypted concurrently: AES-GCM and file I/O release the GIL
+        def extract_all():
+            failed = []  # (name, error)
+            with ThreadPoolExecutor(max_workers=min(len(selected_files), os.cpu_count() or 1)) as ex:
+                future_map = {ex.submit(extract_one, item): item for item in selected_files}
+                for fut in as_completed(future_map):
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        # InvalidTag has no message of its own
+                        failed.append((future_map[fut][1], str(e) or type(e).__name__))
+            return failed
+
+    def on_extracted(failed):
+        parent_window.save_btn.setEnabled(parent_window.inner is inner)
+        if failed:
+            msg = f"Extracted {len(selected_files) - len(failed)} file(s). Failed to extract {len(failed)}:"
+            for name, err in failed[:5]:
+                msg += f"\n• {name}: {err}"
+            if len(failed) > 5:
+                msg += f"\n... and {len(failed) - 5} more"
+            parent_window.show_message(msg, "warning")
+        else:
+            parent_window.show_message(message, "success")
+
+    def on_error(e):
+        parent_window.save_btn.setEnabled(parent_window.inner is inner)
+        parent_window.show_message(str(e), "error")
+
+    # Decryption runs on a pool thread; the window stays responsive meanwhile
+    parent_window.save_btn.setEnabled(False)
+    run_in_background(extract_all, on_finished=on_extracted, on_error=on_error)
@@ -1,5 +1,4 @@
-"""Tree widget operations for the GUI application."""
-from pathlib import Path
+"""Tree view operations for the GUI application."""
 
 try:
     from PyQt6 import QtWidgets, QtCore
@@ -7,273 +6,216 @@ except ImportError:
     pass
 
 
-def populate_tree(tree_widget, inner_metadata, set_descendants_checked_callback):
-    """Populate tree widget with files from vault metadata.
-    
+# bytes.translate table swapping 0 and 1 (hidden <-> visible)
+_FLIP = bytes([1, 0]) + bytes(254)
+
+
+def populate_tree(tree_view, inner_metadata):
+    """Populate the tree view with files from vault metadata.
+
+    The view's VaultFileModel is reloaded in one reset; no per-row items are
+    created, the view only queries the rows it paints.
+
     Args:
-        tree_widget: QTreeWidget to populate
+        tree_view: QTreeView backed by a VaultFileModel
         inner_metadata: Vault metadata containing files list
-        set_descendants_checked_callback: Function to set descendants checked state
     """
-    tree_widget.clear()
-    # Build folder structure from relpaths
-    folders = {}
-    for f in inner_metadata.files:
-        relpath = f.get("relpath") or f.get("name", "")
-        parts = Path(relpath).parts
-        parent = tree_widget.invisibleRootItem()
-        current_path = []
-        # Create/find folder nodes
-        for part in parts[:-1]:
-            current_path.append(part)
-            key = "/".join(current_path)
-            if key not in folders:
-                item = QtWidgets.QTreeWidgetItem(["", "", part, "", "/".join(current_path)])
-                item.setFirstColumnSpanned(False)
-                folders[key] = item
-                parent.addChild(item)
-                # Add checkbox to folder node and wire it to toggle descendants
-                folder_checkbox = QtWidgets.QCheckBox()
-                # Keep small margins so nested indentation doesn't hide the widget
-                folder_checkbox.setStyleSheet("margin-left:4px; margin-right:4px;")
-                tree_widget.setItemWidget(item, 0, folder_checkbox)
-                # Capture current item in a closure
-                def make_handler(folder_item):
-                    def handler(state):
-                        set_descendants_checked_callback(folder_item, state == QtCore.Qt.CheckState.Checked)
-                    return handler
-                folder_checkbox.stateChanged.connect(make_handler(item))
-            parent = folders[key]
-        # Add file leaf
-        leaf = QtWidgets.QTreeWidgetItem(["", f.get("id", ""), f.get("name", ""), str(f.get("size", 0)), relpath])
-        parent.addChild(leaf)
-        # Add a checkbox widget on column 0
-        checkbox = QtWidgets.QCheckBox()
-        checkbox.setStyleSheet("margin-left:4px; margin-right:4px;")
-        tree_widget.setItemWidget(leaf, 0, checkbox)
-
-
-def filter_tree_items(tree_widget, search_text):
+    tree_view.model().load(inner_metadata.files)
+
+
+def filter_tree_items(tree_view, search_text):
     """Filter tree items based on search text.
     
     Args:
-        tree_widget: QTreeWidget to filter
+        tree_view: QTreeView backed by a VaultFileModel
         search_text: Text to search for in file names and paths
     """
+    model = tree_view.model()
     search_text = search_text.lower().strip()
     
-    # If search is empty, show all items
     if not search_text:
-        it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-        while it.value():
-            item = it.value()
-            item.setHidden(False)
-            it += 1
-        return
+        # Empty search shows all items
+        hidden = bytearray(len(model.hidden))
+        model.filter_query = ""
+        model.filter_matches = model.search_index
+    else:
+        # A query containing the previous one can only match a subset of what
+        # that one matched (typing "fo" -> "foo"): search just those
+        candidates = model.search_index
+        if model.filter_query and model.filter_query in search_text:
+            candidates = model.filter_matches
+        # Match files against the cached lowercase strings (pure Python, no
+        # calls into Qt)
+        matches = [
+            entry for entry in candidates
+            if search_text in entry[1] or search_text in entry[2]
+        ]
+        model.filter_query = search_text
+        model.filter_matches = matches
+
+        # Mark the matches plus their parent folders visible
+        visible = bytearray(len(model.hidden))
+        parents = model.parents
+        for node, _, _ in matches:
+            visible[node] = 1
+            parent = parents[node]
+            # Stop at the first folder already marked: its ancestors are too
+            while parent >= 0 and not visible[parent]:
+                visible[parent] = 1
+                parent = parents[parent]
+        hidden = visible.translate(_FLIP)
+
+    # Only rows whose visibility actually changes go to the view
+    # (removed nodes have row -1 and are no longer in it)
+    rows = model.rows
+    for node, (was_hidden, is_hidden) in enumerate(zip(model.hidden, hidden)):
+        if was_hidden != is_hidden and rows[node] >= 0:
+            tree_view.setRowHidden(rows[node], model.index_of(model.parents[node]), bool(is_hidden))
+    model.hidden = hidden
+
+    if search_text:
+        # Reveal matches inside collapsed folders: one recursive expand in C++
+        # rather than setExpanded on each matched folder
+        tree_view.expandAll()
+
+
+def insert_tree_items(tree_view, files):
+    """Add files to the tree without repopulating it.
     
-    # First pass: collect matching files and their parent folders
-    # Use a set of object IDs for O(1) lookup (QTreeWidgetItems aren't hashable)
-    items_to_show_ids = set()
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        # Files have an ID in column 1, folders have empty string
-        if item.text(1):  # This is a file
-            # Get file name and relpath for matching
-            file_name = item.text(2).lower()
-            file_relpath = item.text(4).lower()
-            
-            # Check if search text matches name or relpath
-            if search_text in file_name or search_text in file_relpath:
-                # Mark this file and all parent folders to be shown
-                items_to_show_ids.add(id(item))
-                parent = item.parent()
-                while parent is not None:
-                    items_to_show_ids.add(id(parent))
-                    parent = parent.parent()
-        it += 1
+    Args:
+        tree_view: QTreeView backed by a VaultFileModel
+        files: Metadata entries of the files added to the vault
+    """
+    model = tree_view.model()
+    model.add_files(files)
+    if model.filter_query:
+        # New rows start visible: hide the ones the active search doesn't match
+        filter_tree_items(tree_view, model.filter_query)
+
+
+def update_tree_item(tree_view, entry):
+    """Refresh a file's row after its content changed in the vault.
     
-    # Second pass: show/hide all items based on the collected IDs
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        item.setHidden(id(item) not in items_to_show_ids)
-        it += 1
+    Args:
+        tree_view: QTreeView backed by a VaultFileModel
+        entry: Updated metadata entry of the file
+    """
+    tree_view.model().update_file(entry)
+
+
+def remove_tree_items(tree_view, file_ids):
+    """Remove files from the tree without repopulating it.
+    
+    Args:
+        tree_view: QTreeView backed by a VaultFileModel
+        file_ids: IDs of the files removed from the vault
+    """
+    tree_view.model().remove_files(file_ids)
 
 
-def set_descendants_checked(tree_widget, item, checked):
-    """Recursively set all descendant file checkboxes.
+def set_descendants_checked(tree_view, node, checked):
+    """Set the check state of a folder and all its descendants.
     
     Args:
-        tree_widget: QTreeWidget containing the item
-        item: QTreeWidgetItem whose descendants to check/uncheck
+        tree_view: QTreeView backed by a VaultFileModel
+        node: Model node whose descendants to check/uncheck
         checked: bool, True to check, False to uncheck
     """
-    for i in range(item.childCount()):
-        child = item.child(i)
-        cb = tree_widget.itemWidget(child, 0)
-        if cb is not None:
-            cb.setChecked(checked)
-        # Recurse into folders
-        if child.childCount() > 0:
-            set_descendants_checked(tree_widget, child, checked)
+    tree_view.model().set_checked(node, checked)
 
 
-def clear_all_checkboxes(tree_widget):
+def clear_all_checkboxes(tree_view):
     """Clear all checkboxes in the tree.
     
     Args:
-        tree_widget: QTreeWidget to clear checkboxes in
+        tree_view: QTreeView to clear checkboxes in
     """
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        cb = tree_widget.itemWidget(item, 0)
-        if cb is not None:
-            # Use setChecked to update UI; connected handlers will run as expected
-            cb.setChecked(False)
-        it += 1
+    tree_view.model().set_all_checked(False)
 
 
-def select_all_items(tree_widget):
+def select_all_items(tree_view):
     """Select all files in the tree.
     
     Args:
-        tree_widget: QTreeWidget to select all items in
+        tree_view: QTreeView to select all items in
     """
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        checkbox = tree_widget.itemWidget(item, 0)
-        if checkbox:
-            checkbox.setChecked(True)
-        it += 1
+    tree_view.model().set_all_checked(True)
 
 
-def deselect_all_items(tree_widget):
+def deselect_all_items(tree_view):
     """Deselect all files in the tree.
     
     Args:
-        tree_widget: QTreeWidget to deselect all items in
+        tree_view: QTreeView to deselect all items in
     """
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        checkbox = tree_widget.itemWidget(item, 0)
-        if checkbox:
-            checkbox.setChecked(False)
-        it += 1
+    tree_view.model().set_all_checked(False)
 
 
-def get_selected_files(tree_widget):
+def get_selected_files(tree_view):
     """Get list of selected file IDs and names.
     
     Args:
-        tree_widget: QTreeWidget to get selections from
+        tree_view: QTreeView to get selections from
         
     Returns:
         list of tuples: [(file_id, file_name, file_relpath), ...]
     """
-    selected = []
-    it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-    while it.value():
-        item = it.value()
-        checkbox = tree_widget.itemWidget(item, 0)
-        # only leaves have IDs
-        if checkbox and checkbox.isChecked() and item.text(1):
-            selected.append((item.text(1), item.text(2), item.text(4)))
-        it += 1
-    return selected
-
-
-def handle_tree_item_clicked(tree_widget, item, column, last_clicked_item, set_descendants_checked_callback):
+    return tree_view.model().selected_files()
+
+
+def handle_tree_item_clicked(tree_view, index, last_clicked_node):
     """Handle clicks on tree rows for selection.
     
     Args:
-        tree_widget: QTreeWidget
-        item: QTreeWidgetItem that was clicked
-        column: int, column index that was clicked
-        last_clicked_item: Previously clicked item for shift-range selection
-        set_descendants_checked_callback: Function to set descendants checked state
+        tree_view: QTreeView backed by a VaultFileModel
+        index: QModelIndex that was clicked
+        last_clicked_node: Previously clicked node for shift-range selection
         
     Returns:
-        QTreeWidgetItem: Updated last_clicked_item
+        int: Updated last_clicked_node
     """
     try:
-        if item is None:
-            return last_clicked_item
+        if index is None or not index.isValid():
+            return last_clicked_node
 
+        model = tree_view.model()
+        node = model.node(index)
         modifiers = QtWidgets.QApplication.keyboardModifiers()
 
         # Clicking the checkbox column should preserve default multi-select checkbox behavior
-        if column == 0:
-            # update last clicked item for shift-range behavior
-            return item
+        if index.column() == 0:
+            # update last clicked node for shift-range behavior
+            return node
 
         # Ctrl+click: toggle the clicked row's checkbox without changing others
         if modifiers & QtCore.Qt.KeyboardModifier.ControlModifier:
-            cb = tree_widget.itemWidget(item, 0)
-            if cb is not None:
-                cb.setChecked(not cb.isChecked())
-            return item
-
-        # Shift+click: select a contiguous range from last clicked item to this one
-        if modifiers & QtCore.Qt.KeyboardModifier.ShiftModifier and last_clicked_item is not None:
-            # Build a flat list of tree items in visual order
-            items = []
-            it = QtWidgets.QTreeWidgetItemIterator(tree_widget)
-            while it.value():
-                items.append(it.value())
-                it += 1
+            model.set_checked(node, not model.is_checked(node))
+            return node
 
+        # Shift+click: select a contiguous range from last clicked node to this one
+        if modifiers & QtCore.Qt.KeyboardModifier.ShiftModifier and last_clicked_node is not None:
+            # Flat list of nodes in visual order
+            nodes = list(model.preorder())
             try:
-                i1 = items.index(last_clicked_item)
-                i2 = items.index(item)
+                i1 = nodes.index(last_clicked_node)
+                i2 = nodes.index(node)
             except ValueError:
-                # Fallback to single selection if items can't be located
-                i1 = i2 = None
-
-            if i1 is None or i2 is None:
-                # fallback single select
-                clear_all_checkboxes(tree_widget)
-                cb = tree_widget.itemWidget(item, 0)
-                if cb is not None:
-                    cb.setChecked(True)
-                return item
+                # Fallback to single selection if nodes can't be located
+                model.set_all_checked(False)
+                model.set_checked(node, True)
+                return node
 
             start, end = sorted((i1, i2))
-            clear_all_checkboxes(tree_widget)
-            for idx in range(start, end + 1):
-                it_item = items[idx]
-                if it_item.childCount() != 0:
-                    # folder: check its checkbox and all descendants
-                    folder_cb = tree_widget.itemWidget(it_item, 0)
-                    if folder_cb is not None:
-                        folder_cb.setChecked(True)
-                    set_descendants_checked_callback(it_item, True)
-                else:
-                    cb = tree_widget.itemWidget(it_item, 0)
-                    if cb is not None:
-                        cb.setChecked(True)
-
-            return item
-
-        # Default (no modifiers): single-select the clicked item or folder contents
-        if item.childCount() != 0:
-            # folder node clicked (non-checkbox column): select all descendants
-            clear_all_checkboxes(tree_widget)
-            folder_cb = tree_widget.itemWidget(item, 0)
-            if folder_cb is not None:
-                folder_cb.setChecked(True)
-            set_descendants_checked_callback(item, True)
-            return item
-
-        # Leaf item clicked normally: clear others and check this one only
-        clear_all_checkboxes(tree_widget)
-        cb = tree_widget.itemWidget(item, 0)
-        if cb is not None:
-            cb.setChecked(True)
-        return item
+            model.set_all_checked(False)
+            # Folders check all their descendants
+            for it_node in nodes[start:end + 1]:
+                model.set_checked(it_node, True)
+            return node
+
+        # Default (no modifiers): single-select the clicked file or folder contents
+        model.set_all_checked(False)
+        model.set_checked(node, True)
+        return node
     except Exception:
         # Non-critical UI handler: ignore unexpected errors
-        return last_clicked_item
+        return last_clicked_node
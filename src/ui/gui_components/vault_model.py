@@ -0,0 +1,395 @@
+"""Item model backing the vault file tree."""
+import sys
+from pathlib import Path
+
+try:
+    from PyQt6 import QtCore
+except Exception as e:
+    print("[!] PyQt6 not installed. pip install PyQt6")
+    sys.exit(1)
+
+HEADERS = ["Select", "ID", "Name", "Size", "Relpath"]
+COL_SELECT, COL_ID, COL_NAME, COL_SIZE, COL_RELPATH = range(len(HEADERS))
+
+_ROOT = -1
+
+_SIZE_UNITS = ("KiB", "MiB", "GiB", "TiB")
+
+
+def _format_size(size):
+    """Human-readable size: plain bytes below 1 KiB, then one decimal in binary units."""
+    if size < 1024:
+        return f"{size} B"
+    for unit in _SIZE_UNITS:
+        size /= 1024
+        if round(size, 1) < 1024 or unit == _SIZE_UNITS[-1]:
+            return f"{size:.1f} {unit}"
+
+
+class VaultFileModel(QtCore.QAbstractItemModel):
+    """Folders and files of the vault as a tree model over flat parallel arrays.
+
+    Every folder and file is a node number indexing the lists below; a
+    QModelIndex carries its node in internalId(). No per-row objects are built:
+    the view asks data() for the rows it actually paints.
+
+    Files hold their own check state in `checked`; a folder's state is derived
+    from how many of the files below it are checked, so it never needs a walk.
+    The checked files are also kept as a set, so gathering the selection costs
+    O(checked) rather than a pass over the whole vault.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._reset_arrays()
+
+    def _reset_arrays(self):
+        self.ids = []           # file id, "" for folders
+        self.names = []
+        self.sizes = []         # None for folders
+        self.size_texts = []    # size column text, formatted on first display ("" for folders)
+        self.relpaths = []      # folder key ("a/b") for folders
+        self.parents = []       # parent node, _ROOT for the top level
+        self.rows = []          # row within the parent, -1 once removed
+        self.children = []      # child nodes for folders, None for files
+        self.top = []           # top-level nodes
+        self.node_by_id = {}    # file id -> node
+        self.folder_nodes = {}  # folder key -> node
+        self.checked = bytearray()
+        self.checked_nodes = set()  # file nodes whose checked byte is set
+        self.live_files = bytearray()  # 1 for file nodes still in the tree
+        self.hidden = bytearray()   # rows hidden by the search filter
+        self._file_counts = []      # files below each folder
+        self._checked_counts = []   # checked files below each folder
+        # (node, name lower, relpath lower) per file for the search filter
+        self.search_index = []
+        # Last filter query and the search_index entries it matched
+        self.filter_query = ""
+        self.filter_matches = self.search_index
+
+    def _add_node(self, parent, file_id, name, size, relpath, is_folder):
+        node = len(self.ids)
+        siblings = self.top if parent == _ROOT else self.children[parent]
+        self.ids.append(file_id)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.size_texts.append("" if is_folder else None)
+        self.relpaths.append(relpath)
+        self.parents.append(parent)
+        self.rows.append(len(siblings))
+        self.children.append([] if is_folder else None)
+        self._file_counts.append(0)
+        self._checked_counts.append(0)
+        self.checked.append(0)
+        self.hidden.append(0)
+        self.live_files.append(0 if is_folder else 1)
+        siblings.append(node)
+        return node
+
+    def _folder_node(self, folder_parts, notify=False):
+        """Node of the folder at folder_parts, created (with its ancestors) if missing.
+
+        With notify, each new folder row is announced to the view.
+        """
+        parent = _ROOT
+        current_path = []
+        for part in folder_parts:
+            current_path.append(part)
+            key = "/".join(current_path)
+            node = self.folder_nodes.get(key)
+            if node is None:
+                if notify:
+                    row = len(self.top if parent == _ROOT else self.children[parent])
+                    self.beginInsertRows(self.index_of(parent), row, row)
+                node = self.folder_nodes[key] = self._add_node(parent, "", part, None, key, True)
+                if notify:
+                    self.endInsertRows()
+            parent = node
+        return parent
+
+    def _add_file(self, parent, f, relpath):
+        name = f.get("name", "")
+        node = self._add_node(parent, f.get("id", ""), name, f.get("size", 0), relpath, False)
+        self.node_by_id[self.ids[node]] = node
+        # Lowercased once here, not on every filter keystroke
+        entry = (node, name.lower(), relpath.lower())
+        self.search_index.append(entry)
+        return entry
+
+    def load(self, files):
+        """Replace the contents with the vault's file list (one model reset)."""
+        self.beginResetModel()
+        self._reset_arrays()
+        for f in files:
+            relpath = f.get("relpath") or f.get("name", "")
+            parent = self._folder_node(Path(relpath).parts[:-1])
+            self._add_file(parent, f, relpath)
+            while parent != _ROOT:
+                self._file_counts[parent] += 1
+                parent = self.parents[parent]
+        self.endResetModel()
+
+    def add_files(self, files):
+        """Insert files into the tree in place, creating their folders as needed.
+
+        The files of one folder go in as a single run of rows, so the view keeps
+        its expansion, scroll position and filter on everything else.
+        """
+        groups = {}
+        for f in files:
+            relpath = f.get("relpath") or f.get("name", "")
+            parts = Path(relpath).parts
+            groups.setdefault(parts[:-1], []).append((f, relpath))
+
+        query = self.filter_query
+        for folder_parts, group in groups.items():
+            parent = self._folder_node(folder_parts, notify=True)
+            first = len(self.top if parent == _ROOT else self.children[parent])
+            self.beginInsertRows(self.index_of(parent), first, first + len(group) - 1)
+            for f, relpath in group:
+                entry = self._add_file(parent, f, relpath)
+                # Keep the incremental filter's candidates complete
+                if query and (query in entry[1] or query in entry[2]):
+                    self.filter_matches.append(entry)
+            self.endInsertRows()
+            # New unchecked files turn a checked folder partial
+            while parent != _ROOT:
+                self._file_counts[parent] += len(group)
+                self._emit_changed(self.parents[parent], self.rows[parent], self.rows[parent])
+                parent = self.parents[parent]
+
+    def update_file(self, entry):
+        """Refresh a file's row after its content (and so its size) changed."""
+        node = self.node_by_id.get(entry.get("id"))
+        if node is None:
+            return
+        self.sizes[node] = entry.get("size", 0)
+        self.size_texts[node] = None
+        index = self.index_of(node, COL_SIZE)
+        self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.DisplayRole])
+
+    def clear(self):
+        self.load([])
+
+    # Node helpers
+
+    def node(self, index):
+        return index.internalId() if index.isValid() else _ROOT
+
+    def index_of(self, node, column=COL_SELECT):
+        if node == _ROOT:
+            return QtCore.QModelIndex()
+        return self.createIndex(self.rows[node], column, node)
+
+    def is_folder(self, node):
+        return self.children[node] is not None
+
+    def preorder(self):
+        """All nodes in display order (folders before their contents)."""
+        stack = list(reversed(self.top))
+        while stack:
+            node = stack.pop()
+            yield node
+            kids = self.children[node]
+            if kids:
+                stack.extend(reversed(kids))
+
+    def check_state(self, node):
+        if self.children[node] is None:
+            checked = self.checked[node]
+        else:
+            count = self._checked_counts[node]
+            if count and count != self._file_counts[node]:
+                return QtCore.Qt.CheckState.PartiallyChecked
+            checked = count
+        return QtCore.Qt.CheckState.Checked if checked else QtCore.Qt.CheckState.Unchecked
+
+    def is_checked(self, node):
+        return self.check_state(node) == QtCore.Qt.CheckState.Checked
+
+    def _emit_changed(self, parent, first, last):
+        parent_index = self.index_of(parent)
+        self.dataChanged.emit(
+            self.index(first, COL_SELECT, parent_index),
+            self.index(last, COL_SELECT, parent_index),
+            [QtCore.Qt.ItemDataRole.CheckStateRole],
+        )
+
+    def set_checked(self, node, checked):
+        """Check or uncheck a file, or every file below a folder."""
+        flag = 1 if checked else 0
+        changed = 0
+        if self.children[node] is None:
+            if self.checked[node] == flag:
+                return
+            self.checked[node] = flag
+            if checked:
+                self.checked_nodes.add(node)
+            else:
+                self.checked_nodes.discard(node)
+            changed = 1
+        else:
+            stack = [node]
+            while stack:
+                folder = stack.pop()
+                kids = self.children[folder]
+                for child in kids:
+                    if self.children[child] is not None:
+                        stack.append(child)
+                    elif self.checked[child] != flag:
+                        self.checked[child] = flag
+                        if checked:
+                            self.checked_nodes.add(child)
+                        else:
+                            self.checked_nodes.discard(child)
+                        changed += 1
+                self._checked_counts[folder] = self._file_counts[folder] if checked else 0
+                self._emit_changed(folder, 0, len(kids) - 1)
+        self._emit_changed(self.parents[node], self.rows[node], self.rows[node])
+
+        if not changed:
+            return
+        delta = changed if checked else -changed
+        parent = self.parents[node]
+        while parent != _ROOT:
+            self._checked_counts[parent] += delta
+            self._emit_changed(self.parents[parent], self.rows[parent], self.rows[parent])
+            parent = self.parents[parent]
+
+    def set_all_checked(self, checked):
+        """Check or uncheck every file: whole-array copies, no per-file loop in Python."""
+        if checked:
+            self.checked = bytearray(self.live_files)
+            self.checked_nodes = set(self.node_by_id.values())
+            self._checked_counts = self._file_counts.copy()
+        else:
+            self.checked = bytearray(len(self.ids))
+            self.checked_nodes = set()
+            self._checked_counts = [0] * len(self.ids)
+        # One signal per folder's rows plus the top level
+        if self.top:
+            self._emit_changed(_ROOT, 0, len(self.top) - 1)
+        for folder in self.folder_nodes.values():
+            self._emit_changed(folder, 0, len(self.children[folder]) - 1)
+
+    def selected_files(self):
+        """[(file_id, file_name, file_relpath), ...] for every checked file, in vault order."""
+        return [
+            (self.ids[node], self.names[node], self.relpaths[node])
+            for node in sorted(self.checked_nodes)
+        ]
+
+    def _remove_node(self, node):
+        parent = self.parents[node]
+        siblings = self.top if parent == _ROOT else self.children[parent]
+        row = self.rows[node]
+        self.beginRemoveRows(self.index_of(parent), row, row)
+        del siblings[row]
+        for r in range(row, len(siblings)):
+            self.rows[siblings[r]] = r
+        # The node number stays allocated (the arrays are never compacted)
+        self.rows[node] = -1
+        self.live_files[node] = 0
+        self.endRemoveRows()
+
+    def remove_files(self, file_ids):
+        """Drop files from the tree in place, with folders left empty.
+
+        Each row goes with its own beginRemoveRows/endRemoveRows, so the view
+        keeps its expansion, scroll position and filter on everything else.
+        """
+        removed = set()
+        for fid in file_ids:
+            node = self.node_by_id.pop(fid, None)
+            if node is None:
+                continue
+            # Unchecking first keeps the folder counts right
+            self.set_checked(node, False)
+            parent = self.parents[node]
+            self._remove_node(node)
+            removed.add(node)
+            while parent != _ROOT:
+                self._file_counts[parent] -= 1
+                grandparent = self.parents[parent]
+                if not self.children[parent]:
+                    self.folder_nodes.pop(self.relpaths[parent], None)
+                    self._remove_node(parent)
+                else:
+                    # Its check state may change with the count (all left checked)
+                    self._emit_changed(self.parents[parent], self.rows[parent], self.rows[parent])
+                parent = grandparent
+        if removed:
+            self.search_index = [entry for entry in self.search_index if entry[0] not in removed]
+            self.filter_matches = [entry for entry in self.filter_matches if entry[0] not in removed]
+
+    # QAbstractItemModel interface
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self.node(parent)
+        kids = self.top if node == _ROOT else self.children[node]
+        if not kids or not 0 <= row < len(kids) or not 0 <= column < len(HEADERS):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, kids[row])
+
+    def parent(self, index=None):
+        if index is None:
+            # QObject.parent()
+            return super().parent()
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.index_of(self.parents[index.internalId()])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node(parent)
+        kids = self.top if node == _ROOT else self.children[node]
+        return len(kids) if kids else 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(HEADERS)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        column = index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column == COL_ID:
+                return self.ids[node]
+            if column == COL_NAME:
+                return self.names[node]
+            if column == COL_SIZE:
+                # Only rows the view paints are ever formatted, and each once
+                text = self.size_texts[node]
+                if text is None:
+                    text = self.size_texts[node] = _format_size(self.sizes[node])
+                return text
+            if column == COL_RELPATH:
+                return self.relpaths[node]
+            return None
+        if role == QtCore.Qt.ItemDataRole.CheckStateRole and column == COL_SELECT:
+            return self.check_state(node)
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and column == COL_SIZE and self.sizes[node] is not None:
+            # Exact byte count behind the rounded display
+            return f"{self.sizes[node]:,} bytes"
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole):
+        if not index.isValid() or index.column() != COL_SELECT or role != QtCore.Qt.ItemDataRole.CheckStateRole:
+            return False
+        self.set_checked(index.internalId(), QtCore.Qt.CheckState(value) == QtCore.Qt.CheckState.Checked)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        flags = QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+        if index.column() == COL_SELECT:
+            flags |= QtCore.Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return None
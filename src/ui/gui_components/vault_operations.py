@@ -1,6 +1,7 @@
 """Vault operations for the GUI application."""
 import argparse
 import sys
+from pathlib import Path
 
 try:
     from PyQt6 import QtWidgets
@@ -8,59 +9,85 @@ except ImportError:
     pass
 
 from cryptography.exceptions import InvalidTag
-from utils.core import unlock, update_file_in_vault
+from crypto.aead import clear_key_cache
+from utils.core import unlock, reload_manifest, prepare_file_update, commit_file_update
 from utils.maintain import cmd_rotate_master
+from ui.gui_components.file_operations import clear_extract_cache
+from ui.gui_components.workers import run_in_background
 
 
 def unlock_vault(parent_window, repo, passphrase, populate_callback):
     """Unlock the vault with the given passphrase.
+
+    Key derivation runs on a pool thread so the window stays responsive; the
+    result is applied to parent_window when it finishes.
     
     Args:
         parent_window: Parent window for dialogs and UI updates
         repo: Repository path
         passphrase: Master passphrase
         populate_callback: Function to call to populate the tree
-        
-    Returns:
-        tuple: (inner_metadata, kmaster) on success, (None, None) on failure
     """
     if not passphrase:
         parent_window.show_message("Please enter a passphrase", "warning")
-        return None, None
+        return
+
+    parent_window.pass_edit.setEnabled(False)
+    parent_window.open_vault_btn.setEnabled(False)
+    parent_window.show_message("Unlocking vault…", "info")
+    run_in_background(
+        unlock, repo, passphrase,
+        on_finished=lambda result: _on_unlocked(parent_window, repo, result, populate_callback),
+        on_error=lambda e: _on_unlock_failed(parent_window, e),
+    )
+
+
+def _on_unlocked(parent_window, repo, result, populate_callback):
+    parent_window.pass_edit.setEnabled(True)
+    parent_window.open_vault_btn.setEnabled(True)
+    if parent_window.repo != repo:
+        # Repository closed or switched while the key was being derived
+        return
+    inner, kmaster, kdf = result
+
+    # Update UI to show vault is unlocked; the key and KDF header are held
+    # so later changes save without deriving the key again
+    parent_window.inner = inner
+    parent_window.kmaster = kmaster
+    parent_window.kdf = kdf
     
-    try:
-        inner, kmaster, _ = unlock(repo, passphrase)
-        
-        # Update UI to show vault is unlocked
-        parent_window.inner = inner
-        parent_window.kmaster = kmaster
-        
-        # Hide passphrase input, show lock button
-        parent_window.pass_edit.setVisible(False)
-        parent_window.open_vault_btn.setVisible(False)
-        parent_window.lock_btn.setVisible(True)
-        
-        # Enable controls
-        parent_window.add_btn.setEnabled(True)
-        parent_window.add_folder_btn.setEnabled(True)
-        parent_window.save_btn.setEnabled(True)
-        parent_window.open_btn.setEnabled(True)
-        parent_window.remove_btn.setEnabled(True)
-        parent_window.rotate_btn.setEnabled(True)
-        parent_window.select_all_btn.setEnabled(True)
-        parent_window.deselect_all_btn.setEnabled(True)
-        parent_window.search_edit.setEnabled(True)
-        
-        populate_callback()
-        parent_window.show_message("Vault unlocked successfully", "success")
-        return inner, kmaster
-        
-    except InvalidTag:
+    # The held key is all later operations need: don't keep the passphrase
+    # in the line edit for the rest of the session
+    parent_window.pass_edit.clear()
+
+    # Hide passphrase input, show lock button
+    parent_window.pass_edit.setVisible(False)
+    parent_window.open_vault_btn.setVisible(False)
+    parent_window.lock_btn.setVisible(True)
+    
+    # Enable controls
+    parent_window.add_btn.setEnabled(True)
+    parent_window.add_folder_btn.setEnabled(True)
+    parent_window.save_btn.setEnabled(True)
+    parent_window.open_btn.setEnabled(True)
+    parent_window.remove_btn.setEnabled(True)
+    parent_window.rotate_btn.setEnabled(True)
+    parent_window.select_all_btn.setEnabled(True)
+    parent_window.deselect_all_btn.setEnabled(True)
+    parent_window.search_edit.setEnabled(True)
+    
+    populate_callback()
+    parent_window.show_message("Vault unlocked successfully", "success")
+
+
+def _on_unlock_failed(parent_window, error):
+    parent_window.pass_edit.setEnabled(True)
+    parent_window.open_vault_btn.setEnabled(True)
+    if isinstance(error, InvalidTag):
         parent_window.show_message("Invalid passphrase or corrupted vault", "error")
-        return None, None
-    except Exception as e:
-        parent_window.show_message(f"Failed to unlock vault: {str(e)}", "error")
-        return None, None
+    else:
+        parent_window.show_message(f"Failed to unlock vault: {str(error)}", "error")
+    parent_window.pass_edit.setFocus()
 
 
 def lock_vault(parent_window):
@@ -72,9 +99,12 @@ def lock_vault(parent_window):
     # Clear unlocked state but keep repo path
     parent_window.inner = None
     parent_window.kmaster = None
+    parent_window.kdf = None
+    clear_key_cache()
+    clear_extract_cache(parent_window)
     parent_window.current_editor = None
     parent_window.current_file_id = None
-    parent_window.tree.clear()
+    parent_window.tree.model().clear()
 
     # Disable controls that require unlock
     for btn in (
@@ -130,9 +160,12 @@ def close_repository(parent_window):
     parent_window.repo = None
     parent_window.inner = None
     parent_window.kmaster = None
+    parent_window.kdf = None
+    clear_key_cache()
+    clear_extract_cache(parent_window)
     parent_window.current_editor = None
     parent_window.current_file_id = None
-    parent_window.tree.clear()
+    parent_window.tree.model().clear()
     parent_window.pass_edit.clear()
 
     # Disable controls
@@ -168,56 +201,114 @@ def close_repository(parent_window):
     return True
 
 
-def change_master_password(parent_window, repo, current_password, new_password, unlock_callback):
+def change_master_password(parent_window, repo, current_password, new_password, populate_callback):
     """Change the master password for the repository.
+
+    The rotation (two Argon2 runs) happens on a pool thread. The held key and
+    metadata are dropped before it starts and the vault controls stay disabled
+    until the vault is unlocked again: a save with the old key and salt would
+    silently undo the rotation. The new key comes back from the rotation, so
+    the vault reopens without deriving it a third time.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
         current_password: Current master password
         new_password: New master password
-        unlock_callback: Function to call to unlock with new password
-        
-    Returns:
-        bool: True on success, False on failure
+        populate_callback: Function to call to populate the tree
     """
-    try:
-        args = argparse.Namespace(repo=str(repo), passphrase=current_password, new_passphrase=new_password, t=None, m=None, p=None)
-        cmd_rotate_master(args)
-        # Update UI to use new password and re-unlock
-        parent_window.pass_edit.setText(new_password)
-        unlock_callback()
+    held = (parent_window.inner, parent_window.kmaster, parent_window.kdf)
+    parent_window.inner = None
+    parent_window.kmaster = None
+    parent_window.kdf = None
+    clear_key_cache()
+    controls = (
+        parent_window.save_btn, parent_window.add_btn, parent_window.add_folder_btn, parent_window.open_btn,
+        parent_window.remove_btn, parent_window.rotate_btn, parent_window.lock_btn, parent_window.close_btn,
+    )
+    for btn in controls:
+        btn.setEnabled(False)
+
+    def rotate(args):
+        kmaster, kdf = cmd_rotate_master(args)
+        return reload_manifest(repo, kmaster), kmaster, kdf
+
+    def on_rotated(result):
+        for btn in controls:
+            btn.setEnabled(True)
+        # Reopen with the new key exactly as an unlock would
+        _on_unlocked(parent_window, repo, result, populate_callback)
         parent_window.show_message("Master password changed successfully", "success")
-        return True
-    except Exception as e:
-        parent_window.show_message(f"Failed to change password: {str(e)}", "error")
-        return False
 
+    def on_error(e):
+        # Nothing was written: the vault is still under the held key
+        parent_window.inner, parent_window.kmaster, parent_window.kdf = held
+        for btn in controls:
+            btn.setEnabled(True)
+        if isinstance(e, InvalidTag):
+            parent_window.show_message("Failed to change password: the current password is wrong", "error")
+        else:
+            parent_window.show_message(f"Failed to change password: {str(e)}", "error")
+
+    parent_window.show_message("Changing master password…", "info")
+    args = argparse.Namespace(repo=str(repo), passphrase=current_password, new_passphrase=new_password, t=None, m=None, p=None)
+    run_in_background(rotate, args, on_finished=on_rotated, on_error=on_error)
 
-def save_text_file_to_vault(parent_window, repo, file_id, content, passphrase, populate_callback):
+
+def save_text_file_to_vault(parent_window, repo, inner, kmaster, kdf, file_id, file_path, updated_callback):
     """Save updated text file content to the vault.
+
+    Only the blob encryption runs on a pool thread; the entry is updated and
+    the vault saved back on the GUI thread, which alone touches inner. One
+    save per file is in flight at a time: a save requested meanwhile runs
+    once the current one lands, from the newest content on disk.
     
     Args:
         parent_window: Parent window for dialogs
         repo: Repository path
+        inner: Unlocked vault metadata, updated in place
+        kmaster: Master key held since unlock
+        kdf: KDF header parameters returned by unlock
         file_id: ID of the file in the vault
-        content: New content for the file
-        passphrase: Master passphrase
-        populate_callback: Function to refresh the file list
-        
-    Returns:
-        tuple: (inner_metadata, kmaster) on success, (None, None) on failure
+        file_path: Saved file holding the new content
+        updated_callback: Function called with the updated file entry to refresh its row
     """
-    try:
-        # Update the file in the vault
-        update_file_in_vault(repo, file_id, content.encode('utf-8'), passphrase)
-        
-        # Refresh the table to show updated file size
-        inner, kmaster, _ = unlock(repo, passphrase)
-        populate_callback()
-        
-        parent_window.show_message("File updated in vault successfully", "success")
-        return inner, kmaster
-    except Exception as e:
+    saves = parent_window._vault_saves
+    if file_id in saves:
+        saves[file_id] = file_path
+        return
+    saves[file_id] = None
+
+    def encrypt():
+        # The editor has just written the new content to file_path: stream it
+        # from there rather than encoding the whole buffer a second time
+        with open(file_path, 'rb') as src:
+            return prepare_file_update(repo, kmaster, src)
+
+    def next_save():
+        queued = saves.pop(file_id, None)
+        if queued is not None and parent_window.inner is inner:
+            save_text_file_to_vault(parent_window, repo, inner, kmaster, kdf, file_id, queued, updated_callback)
+
+    def on_encrypted(update):
+        if parent_window.inner is not inner:
+            # Vault locked or closed meanwhile: the new blob is not needed
+            (Path(repo) / update["blob"]).unlink(missing_ok=True)
+            saves.pop(file_id, None)
+            return
+        try:
+            entry = commit_file_update(repo, inner, kmaster, kdf, file_id, update)
+        except Exception as e:
+            parent_window.show_message(f"Failed to update file in vault: {str(e)}", "error")
+        else:
+            # Refresh the row to show updated file size
+            updated_callback(entry)
+            parent_window.show_message("File updated in vault successfully", "success")
+        next_save()
+
+    def on_error(e):
         parent_window.show_message(f"Failed to update file in vault: {str(e)}", "error")
-        return None, None
+        next_save()
+
+    parent_window.show_message("Saving file to vault…", "info")
+    run_in_background(encrypt, on_finished=on_encrypted, on_error=on_error)
@@ -0,0 +1,57 @@
+"""Background workers for the GUI application."""
+import sys
+from functools import partial
+
+try:
+    from PyQt6 import QtCore
+except Exception as e:
+    print("[!] PyQt6 not installed. pip install PyQt6")
+    sys.exit(1)
+
+
+class _WorkerSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(object)
+
+
+class _Worker(QtCore.QRunnable):
+    """Runs one call on a pool thread and reports its result or exception."""
+
+    def __init__(self, fn, args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.error.emit(e)
+            return
+        self.signals.finished.emit(result)
+
+
+# Workers in flight: holding them keeps their signal objects alive until the
+# result has been delivered
+_running = set()
+
+
+def _deliver(worker, callback, value):
+    _running.discard(worker)
+    if callback is not None:
+        callback(value)
+
+
+def run_in_background(fn, *args, on_finished=None, on_error=None):
+    """Run fn(*args) on the global QThreadPool.
+
+    on_finished(result) or on_error(exception) is then called on the GUI thread
+    (the signals are queued there), so callbacks may touch widgets freely.
+    """
+    worker = _Worker(fn, args)
+    worker.signals.finished.connect(partial(_deliver, worker, on_finished))
+    worker.signals.error.connect(partial(_deliver, worker, on_error))
+    _running.add(worker)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
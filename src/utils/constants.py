@@ -0,0 +1,6 @@
+"""Shared constants with no heavy imports (safe for CLI parser construction)."""
+
+# Argon2id defaults for new vaults
+DEFAULT_T_COST = 4
+DEFAULT_M_COST_KiB = 262144  # 256 MiB (tune per device)
+DEFAULT_PARALLELISM = 2
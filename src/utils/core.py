@@ -1,49 +1,84 @@
 import argparse
+import io
 import os
 import sys
+import threading
 import uuid
 
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict
+from typing import Any, BinaryIO, Dict
 
-from crypto.aead import aead_encrypt, aead_decrypt
-from crypto.hash import derive_kmaster
-from storage.vault import save_vault, load_vault
+from crypto.aead import aead_encrypt, aead_decrypt, aead_encrypt_stream, aead_decrypt_stream, GCM_TAG_SIZE
+from crypto.hash import derive_kmaster, PREHASH_SHA3_512
+from crypto.rng import csprng, csprng_into
+from crypto.zeroize import zeroize
+from storage.vault import save_vault, load_vault, load_vault_header
 from utils.helper import repo_paths, rel_time_iso
-from utils.dataModels import InnerMetadata, KeyWrap, FileEntry
-
-def prepare_file_add(repo: Path, src: Path, relpath: str | None, kmaster: bytes) -> FileEntry:
-    p = repo_paths(repo)
-    file_key = os.urandom(32)
-    plaintext = src.read_bytes()
-    file_nonce = os.urandom(12)
-    file_ct = AESGCM(file_key).encrypt(file_nonce, plaintext, None)
-
-    fid = str(uuid.uuid4())
-    blob_path = p["blobs"] / f"{fid}.bin"
-    with blob_path.open("wb") as f:
-        f.write(file_nonce + file_ct)
-
-    wrap_nonce, wrap_ct = aead_encrypt(kmaster, file_key)
-    import base64
-    keywrap = KeyWrap(nonce_b64=base64.b64encode(wrap_nonce).decode(), ct_b64=base64.b64encode(wrap_ct).decode())
+from utils.dataModels import InnerMetadata, FileEntry, VAULT_SHA3_VERSION
+
+def _write_blob(src_f: BinaryIO, blob_dir: Path) -> tuple[str, bytearray, int]:
+    """Stream-encrypt src_f into a new blob, named by a fresh uuid, under a new random key.
+
+    Returns (uuid, file_key, size); a failed write leaves no partial blob behind.
+    """
+    # Generate per-file key (mutable so it can be wiped once wrapped)
+    file_key = csprng_into(bytearray(32))  # AES-256
+    file_nonce = csprng(12)
+
+    # Stream-encrypt file content with file_key into blob: nonce||ct||tag
+    name = str(uuid.uuid4())
+    blob_path = blob_dir / f"{name}.bin"
+    try:
+        with blob_path.open("wb") as f:
+            f.write(file_nonce)
+            size = aead_encrypt_stream(file_key, file_nonce, src_f, f)
+    except BaseException:
+        blob_path.unlink(missing_ok=True)
+        zeroize(file_key)
+        raise
+    return name, file_key, size
+
+
+def _encrypt_blob(src: Path, blob_dir: Path) -> tuple[str, bytearray, int, float, float]:
+    """Stream-encrypt src into a fresh blob under a new random key.
+
+    Top-level so it can run in a ProcessPoolExecutor worker.
+    Returns (fid, file_key, size, ctime, mtime).
+    """
+    with src.open("rb") as src_f:
+        st = os.fstat(src_f.fileno())
+        fid, file_key, size = _write_blob(src_f, blob_dir)
+    return fid, file_key, size, st.st_ctime, st.st_mtime
+
+
+def _file_entry(src: Path, relpath: str | None, kmaster: bytes, fid: str, file_key: bytearray,
+                size: int, ctime: float, mtime: float) -> FileEntry:
+    # Wrap file_key with Kmaster; the plaintext key is not needed afterwards
+    keywrap = aead_encrypt(kmaster, file_key)
+    zeroize(file_key)
 
     # normalize relpath to POSIX style if provided
     relpath_value = str(Path(relpath).as_posix()) if relpath else None
 
-    entry = FileEntry(
+    return FileEntry(
         id=fid,
         name=src.name,
         relpath=relpath_value,
         blob=f"blobs/{fid}.bin",
-        size=len(plaintext),
-        created_at=rel_time_iso(os.path.getctime(src)),
-        modified_at=rel_time_iso(os.path.getmtime(src)),
+        size=size,
+        created_at=rel_time_iso(ctime),
+        modified_at=rel_time_iso(mtime),
         mimetype=None,
         file_key_wrap=keywrap,
     )
-    return entry
+
+
+def prepare_file_add(repo: Path, src: Path, relpath: str | None, kmaster: bytes) -> FileEntry:
+    """Encrypt src into a new blob and return its (not yet saved) metadata entry."""
+    p = repo_paths(repo)
+    return _file_entry(src, relpath, kmaster, *_encrypt_blob(src, p["blobs"]))
 
 def cmd_init(args: argparse.Namespace) -> None:
     repo = Path(args.repo)
@@ -55,6 +90,11 @@ def cmd_init(args: argparse.Namespace) -> None:
         print(f"[!] {p['vault']} exists. Use --force to overwrite.")
         sys.exit(1)
 
+    if getattr(args, "calibrate", False):
+        from utils.maintain import calibrate_kdf
+        args.t, args.m, args.p = calibrate_kdf(args.target_ms)
+        print(f"[*] Calibrated Argon2id: t={args.t} m={args.m} KiB p={args.p}")
+
     salt = os.urandom(16)
     kmaster = derive_kmaster(args.passphrase, salt, args.t, args.m, args.p)
 
@@ -71,105 +111,134 @@ def cmd_init(args: argparse.Namespace) -> None:
 
 def unlock(repo: Path, passphrase: str) -> tuple[InnerMetadata, bytes, Dict[str, int | bytes]]:
     p = repo_paths(repo)
-    t, m, paral, salt, nonce, ct = load_vault(p["vault"])
-    kmaster = derive_kmaster(passphrase, salt, t, m, paral)
+    t, m, paral, salt, nonce, ct, ver = load_vault(p["vault"])
+    # v1/v2 vaults keep their SHA3 prehash (and are saved back as v2) until rotate-master
+    if ver <= VAULT_SHA3_VERSION:
+        kmaster = derive_kmaster(passphrase, salt, t, m, paral, PREHASH_SHA3_512)
+        save_ver = VAULT_SHA3_VERSION
+    else:
+        kmaster = derive_kmaster(passphrase, salt, t, m, paral)
+        save_ver = ver
     inner_bytes = aead_decrypt(kmaster, nonce, ct)
-    inner = InnerMetadata.from_bytes(inner_bytes)
-    return inner, kmaster, {"t": t, "m": m, "p": paral, "salt": salt}
+    inner = InnerMetadata.from_bytes(inner_bytes, ver)
+    return inner, kmaster, {"t": t, "m": m, "p": paral, "salt": salt, "ver": save_ver}
 
 
-def update_file_in_vault(repo: Path, fid: str, new_content: bytes, passphrase: str) -> None:
-    """Update an existing file in the vault with new content."""
-    inner, kmaster, kdf = unlock(repo, passphrase)
-    p = repo_paths(repo)
+def reload_manifest(repo: Path, kmaster: bytes) -> InnerMetadata:
+    """Re-read vault.enc and decrypt the inner metadata with a kmaster unlock() already derived.
 
-    # Find the file entry
-    match = next((f for f in inner.files if f["id"] == fid), None)
-    if not match:
-        raise ValueError(f"No such id: {fid}")
+    No Argon2 run: use this instead of unlock() to refresh a vault that is held open.
+    """
+    _, _, _, _, nonce, ct, ver = load_vault(repo_paths(repo)["vault"])
+    return InnerMetadata.from_bytes(aead_decrypt(kmaster, nonce, ct), ver)
 
-    # Generate new per-file key
-    file_key = os.urandom(32)  # AES-256
 
-    # Encrypt new content with new file_key
-    file_nonce = os.urandom(12)
-    file_ct = AESGCM(file_key).encrypt(file_nonce, new_content, None)
+# The GUI saves from pool threads as well as its own: serialising snapshot and
+# write keeps an older snapshot from landing on disk after a newer one.
+# Master key rotation holds it too, across its read and rewrite of vault.enc
+save_lock = threading.Lock()
 
-    # Write new blob: nonce||ct
-    blob_path = p["blobs"] / f"{fid}.bin"
-    with blob_path.open("wb") as f:
-        f.write(file_nonce + file_ct)
 
-    # Wrap new file_key with Kmaster
-    wrap_nonce, wrap_ct = aead_encrypt(kmaster, file_key)
-    import base64
-    keywrap = KeyWrap(nonce_b64=base64.b64encode(wrap_nonce).decode(), ct_b64=base64.b64encode(wrap_ct).decode())
+def save_inner(repo: Path, inner: InnerMetadata, kmaster: bytes, kdf: Dict[str, int | bytes]) -> None:
+    """Re-encrypt inner under kmaster and rewrite vault.enc with the header unlock() returned.
 
-    # Update the file entry
-    match["size"] = len(new_content)
-    match["file_key_wrap"] = keywrap.to_dict()
+    Refuses to write if the master key was rotated since: the old key and salt
+    would silently undo the rotation.
+    """
+    with save_lock:
+        if load_vault_header(repo_paths(repo)["vault"])[3] != kdf["salt"]:
+            raise ValueError("The vault's master key has changed since it was unlocked")
+        inner_bytes = inner.to_bytes()
+        new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
+        save_vault(repo_paths(repo)["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct, kdf["ver"])
 
-    # Re-encrypt inner and save vault
-    inner_bytes = inner.to_bytes()
-    new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-    save_vault(p["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
 
+def prepare_file_update(repo: Path, kmaster: bytes, src: BinaryIO) -> Dict[str, Any]:
+    """Encrypt src (binary) into a new blob for an existing file; nothing is saved yet.
 
-def cmd_add(args: argparse.Namespace) -> None:
-    repo = Path(args.repo)
-    src = Path(args.path)
-    if not src.is_file():
-        print(f"[!] Not a file: {src}")
-        sys.exit(1)
+    The file's current blob is left alone: the returned blob, size and key wrap
+    only take its place through commit_file_update().
+    """
+    name, file_key, size = _write_blob(src, repo_paths(repo)["blobs"])
 
-    inner, kmaster, kdf = unlock(repo, args.passphrase)
-    p = repo_paths(repo)
+    # Wrap new file_key with Kmaster, then wipe it
+    wrap_nonce, wrap_ct = aead_encrypt(kmaster, file_key)
+    zeroize(file_key)
+    return {"blob": f"blobs/{name}.bin", "size": size, "file_key_wrap": {"nonce": wrap_nonce, "ct": wrap_ct}}
 
-    # Generate per-file key
-    file_key = os.urandom(32)  # AES-256
 
-    # Read plaintext
-    plaintext = src.read_bytes()
+def commit_file_update(repo: Path, inner: InnerMetadata, kmaster: bytes, kdf: Dict[str, int | bytes],
+                       fid: str, update: Dict[str, Any]) -> dict:
+    """Point a file's entry at the blob prepare_file_update() wrote and save the vault.
 
-    # Encrypt file content with file_key
-    file_nonce = os.urandom(12)
-    file_ct = AESGCM(file_key).encrypt(file_nonce, plaintext, None)
+    The old blob is only unlinked once vault.enc refers to the new one. If the
+    save fails the entry is rolled back and the new blob dropped, so the vault
+    never lists a blob under a key that does not open it. Returns the entry.
+    """
+    match = inner.by_id.get(fid)
+    if not match:
+        (Path(repo) / update["blob"]).unlink(missing_ok=True)
+        raise ValueError(f"No such id: {fid}")
 
-    # Write blob: nonce||ct
-    fid = str(uuid.uuid4())
-    blob_path = p["blobs"] / f"{fid}.bin"
-    with blob_path.open("wb") as f:
-        f.write(file_nonce + file_ct)
+    old = {k: match[k] for k in update}
+    match.update(update)
+    try:
+        save_inner(repo, inner, kmaster, kdf)
+    except BaseException:
+        match.update(old)
+        (Path(repo) / update["blob"]).unlink(missing_ok=True)
+        raise
+    (Path(repo) / old["blob"]).unlink(missing_ok=True)
+    return match
+
+
+def update_file_in_vault(repo: Path, inner: InnerMetadata, kmaster: bytes, kdf: Dict[str, int | bytes],
+                         fid: str, src: BinaryIO) -> dict:
+    """Replace the content of a file in an unlocked vault with what src (binary) holds.
+
+    src is stream-encrypted chunk by chunk, so the new content is never in memory
+    as a whole. The entry in inner is updated in place and the vault saved;
+    returns the entry.
+    """
+    if fid not in inner.by_id:
+        raise ValueError(f"No such id: {fid}")
+    return commit_file_update(repo, inner, kmaster, kdf, fid, prepare_file_update(repo, kmaster, src))
 
-    # Wrap file_key with Kmaster
-    wrap_nonce, wrap_ct = aead_encrypt(kmaster, file_key)
-    import base64
-    keywrap = KeyWrap(nonce_b64=base64.b64encode(wrap_nonce).decode(), ct_b64=base64.b64encode(wrap_ct).decode())
 
-    # Optional relative path metadata to preserve folder structure
-    relpath_value = getattr(args, "relpath", None)
-    if relpath_value:
-        # normalize separators to POSIX-style for portability
-        relpath_value = str(Path(relpath_value).as_posix())
+def cmd_add_batch(args: argparse.Namespace) -> None:
+    """Add several files with one unlock (one Argon2 run) and one vault write."""
+    repo = Path(args.repo)
+    srcs = [Path(x) for x in args.paths]
+    for src in srcs:
+        if not src.is_file():
+            print(f"[!] Not a file: {src}")
+            sys.exit(1)
+    relpath = getattr(args, "relpath", None)
+    if relpath and len(srcs) > 1:
+        print("[!] --relpath can only be used when adding a single file")
+        sys.exit(1)
 
-    entry = FileEntry(
-        id=fid,
-        name=src.name,
-        relpath=relpath_value,
-        blob=f"blobs/{fid}.bin",
-        size=len(plaintext),
-        created_at=rel_time_iso(os.path.getctime(src)),
-        modified_at=rel_time_iso(os.path.getmtime(src)),
-        mimetype=None,
-        file_key_wrap=keywrap,
-    )
-    inner.files.append(entry.to_dict())
+    inner, kmaster, kdf = unlock(repo, args.passphrase)
+    p = repo_paths(repo)
 
-    # Re-encrypt inner and save vault
-    inner_bytes = inner.to_bytes()
-    new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-    save_vault(p["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
-    print(f"[+] Encrypted and added {src.name} as id={fid}")
+    # Blob encryption is independent per file: fan it out across processes,
+    # then wrap keys and merge metadata serially (cheap)
+    if len(srcs) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(srcs), os.cpu_count() or 1)) as ex:
+            results = list(ex.map(_encrypt_blob, srcs, repeat(p["blobs"])))
+    else:
+        results = [_encrypt_blob(srcs[0], p["blobs"])]
+
+    added = []
+    for src, res in zip(srcs, results):
+        entry = _file_entry(src, relpath, kmaster, *res)
+        inner.add(entry.to_dict())
+        added.append(entry)
+
+    # Re-encrypt inner and save vault once for the whole batch
+    save_inner(repo, inner, kmaster, kdf)
+    for entry in added:
+        print(f"[+] Encrypted and added {entry.name} as id={entry.id}")
 
 
 def cmd_ls(args: argparse.Namespace) -> None:
@@ -182,31 +251,64 @@ def cmd_ls(args: argparse.Namespace) -> None:
         print(f"{fobj['id']}\t{fobj['name']}\t{fobj['size']} bytes\t{fobj['blob']}")
 
 
-def cmd_extract(args: argparse.Namespace) -> None:
-    repo = Path(args.repo)
-    fid = args.id
-    out = Path(args.out)
-
-    inner, kmaster, _ = unlock(repo, args.passphrase)
+def _decrypt_blob(repo: Path, inner: InnerMetadata, kmaster: bytes, fid: str, dst: BinaryIO) -> dict:
+    """Stream-decrypt a file's blob into dst; returns the file's metadata entry.
 
-    match = next((f for f in inner.files if f["id"] == fid), None)
+    Plaintext reaches dst before the tag is checked: on an exception dst must be discarded.
+    """
+    match = inner.by_id.get(fid)
     if not match:
-        print(f"[!] No such id: {fid}")
-        sys.exit(1)
+        raise ValueError(f"No such id: {fid}")
 
     # Unwrap per-file key
-    import base64
     wrap = match["file_key_wrap"]
-    file_key = aead_decrypt(kmaster, base64.b64decode(wrap["nonce"]), base64.b64decode(wrap["ct"]))
+    file_key = aead_decrypt(kmaster, wrap["nonce"], wrap["ct"])
 
-    # Read blob and decrypt
     blob_path = Path(repo) / match["blob"]
-    blob = blob_path.read_bytes()
-    if len(blob) < 13:
-        print("[!] Corrupt blob")
+    blob_size = blob_path.stat().st_size
+    if blob_size < 12 + GCM_TAG_SIZE:
+        raise ValueError("Corrupt blob")
+    with blob_path.open("rb") as src_f:
+        file_nonce = src_f.read(12)
+        aead_decrypt_stream(file_key, file_nonce, src_f, dst, blob_size - 12)
+    return match
+
+
+def extract_file(repo: Path, inner: InnerMetadata, kmaster: bytes, fid: str, out: Path) -> dict:
+    """Decrypt one file of an already unlocked vault into out.
+
+    Callers holding inner/kmaster skip the Argon2 run that unlock() costs.
+    Returns the file's metadata entry.
+    """
+    if fid not in inner.by_id:
+        raise ValueError(f"No such id: {fid}")
+    # Drop partial plaintext if the tag fails
+    try:
+        with out.open("wb") as out_f:
+            return _decrypt_blob(repo, inner, kmaster, fid, out_f)
+    except Exception:
+        out.unlink(missing_ok=True)
+        raise
+
+
+def extract_file_bytes(repo: Path, inner: InnerMetadata, kmaster: bytes, fid: str) -> bytes:
+    """Decrypt one file of an already unlocked vault into memory; no plaintext touches the disk."""
+    buf = io.BytesIO()
+    _decrypt_blob(repo, inner, kmaster, fid, buf)
+    return buf.getvalue()
+
+
+def cmd_extract(args: argparse.Namespace) -> None:
+    repo = Path(args.repo)
+    fid = args.id
+    out = Path(args.out)
+
+    inner, kmaster, _ = unlock(repo, args.passphrase)
+
+    try:
+        match = extract_file(repo, inner, kmaster, fid, out)
+    except ValueError as e:
+        print(f"[!] {e}")
         sys.exit(1)
-    file_nonce, file_ct = blob[:12], blob[12:]
-    plaintext = AESGCM(file_key).decrypt(file_nonce, file_ct, None)
 
-    out.write_bytes(plaintext)
     print(f"[+] Extracted {match['name']} -> {out}")
@@ -1,26 +1,21 @@
+import base64
 import json
 import struct
+import uuid
 
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, List
+import msgpack
 
-DEFAULT_T_COST = 4
-DEFAULT_M_COST_KiB = 262144  # 256 MiB (tune per device)
-DEFAULT_PARALLELISM = 2
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Tuple
 
 VAULT_MAGIC = b"EFS1"
-VAULT_VERSION = 1
+# 1: JSON inner metadata, 2: msgpack with raw UUIDs/wrap bytes, 3: v2 + BLAKE2b-512 prehash
+VAULT_VERSION = 3
+VAULT_SUPPORTED_VERSIONS = (1, 2, 3)
+VAULT_SHA3_VERSION = 2  # newest version whose Kmaster is prehashed with SHA3-512
 VAULT_HDR_FMT = ">4sBIII16s12s"  # magic, ver, t, m, p, salt(16), nonce(12)
-VAULT_HDR_SIZE = struct.calcsize(VAULT_HDR_FMT)
-
-
-@dataclass
-class KeyWrap:
-    nonce_b64: str
-    ct_b64: str
-
-    def to_dict(self) -> Dict[str, str]:
-        return {"nonce": self.nonce_b64, "ct": self.ct_b64}
+VAULT_HDR = struct.Struct(VAULT_HDR_FMT)
+VAULT_HDR_SIZE = VAULT_HDR.size
 
 
 @dataclass
@@ -33,23 +28,85 @@ class FileEntry:
     created_at: str
     modified_at: str
     mimetype: str | None
-    file_key_wrap: KeyWrap
+    file_key_wrap: Tuple[bytes, bytes]  # raw (nonce, ct) of the wrapped file key
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        d["file_key_wrap"] = self.file_key_wrap.to_dict()
-        return d
+        nonce, ct = self.file_key_wrap
+        return {
+            "id": self.id,
+            "name": self.name,
+            "relpath": self.relpath,
+            "blob": self.blob,
+            "size": self.size,
+            "created_at": self.created_at,
+            "modified_at": self.modified_at,
+            "mimetype": self.mimetype,
+            "file_key_wrap": {"nonce": nonce, "ct": ct},
+        }
+
+
+def _pack_entry(f: Dict[str, Any]) -> Dict[str, Any]:
+    d = dict(f)
+    d["id"] = uuid.UUID(f["id"]).bytes
+    wrap = f["file_key_wrap"]
+    d["file_key_wrap"] = {"n": wrap["nonce"], "c": wrap["ct"]}
+    return d
+
+
+def _unpack_entry(d: Dict[str, Any]) -> None:
+    d["id"] = str(uuid.UUID(bytes=d["id"]))
+    wrap = d["file_key_wrap"]
+    d["file_key_wrap"] = {"nonce": wrap["n"], "ct": wrap["c"]}
+
+
+def _unpack_json_entry(f: Dict[str, Any]) -> None:
+    # v1 vaults stored wrapped keys as base64 text; decode once on load
+    wrap = f["file_key_wrap"]
+    f["file_key_wrap"] = {"nonce": base64.b64decode(wrap["nonce"]), "ct": base64.b64decode(wrap["ct"])}
 
 
 @dataclass
 class InnerMetadata:
     version: int
     files: List[Dict[str, Any]]
+    by_id: Dict[str, Dict[str, Any]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.by_id = {f["id"]: f for f in self.files}
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.files.append(entry)
+        self.by_id[entry["id"]] = entry
+
+    def remove(self, fid: str) -> Dict[str, Any] | None:
+        """Drop an entry by id; files is rebuilt from the index in one pass."""
+        entry = self.by_id.pop(fid, None)
+        if entry is not None:
+            self.files = list(self.by_id.values())
+        return entry
+
+    def remove_many(self, fids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Drop several entries by id; files is rebuilt once for the whole batch."""
+        removed = [entry for entry in (self.by_id.pop(fid, None) for fid in fids) if entry is not None]
+        if removed:
+            self.files = list(self.by_id.values())
+        return removed
 
     def to_bytes(self) -> bytes:
-        return json.dumps({"version": self.version, "files": self.files}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        """Serialize as msgpack (vault v2); ids and wrapped keys are stored as raw bytes."""
+        return msgpack.packb({"v": self.version, "files": [_pack_entry(f) for f in self.files]}, use_bin_type=True)
 
     @staticmethod
-    def from_bytes(b: bytes) -> "InnerMetadata":
-        obj = json.loads(b.decode("utf-8"))
-        return InnerMetadata(version=obj.get("version", 1), files=obj.get("files", []))
+    def from_bytes(b: bytes, vault_version: int = VAULT_VERSION) -> "InnerMetadata":
+        # Entries are converted in place in the decoded list (no second list of n);
+        # msgpack sizes that list from its array header, so the file count needs
+        # no field of its own in the vault header
+        if vault_version == 1:
+            obj = json.loads(b.decode("utf-8"))
+            files, version, unpack = obj.get("files", []), obj.get("version", 1), _unpack_json_entry
+        else:
+            obj = msgpack.unpackb(b, raw=False)
+            files, version, unpack = obj.get("files", []), obj.get("v", 1), _unpack_entry
+        for f in files:
+            unpack(f)
+        return InnerMetadata(version=version, files=files)
@@ -2,70 +2,75 @@ import argparse
 import os
 import sys
 
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from pathlib import Path
+from typing import Dict
 
-from crypto.hash import derive_kmaster
-from crypto.aead import aead_encrypt, aead_decrypt
+from crypto.hash import derive_kmaster, calibrate_t_cost, default_kdf_resources
+from crypto.aead import clear_key_cache
+from crypto.rng import csprng
 from storage.vault import save_vault
-from utils.core import unlock
-from utils.dataModels import InnerMetadata
+from utils.core import unlock, reload_manifest, save_inner, save_lock
+from utils.dataModels import VAULT_VERSION
 from utils.helper import repo_paths
 
 
-def cmd_rm(args: argparse.Namespace) -> None:
+def cmd_rm_batch(args: argparse.Namespace) -> None:
+    """Remove several files with one unlock (one Argon2 run) and one vault write."""
     repo = Path(args.repo)
-    fid = args.id
-    inner, _, kdf = unlock(repo, args.passphrase)
-    match = next((f for f in inner.files if f["id"] == fid), None)
-    if not match:
-        print(f"[!] No such id: {fid}")
-        sys.exit(1)
-    # Delete blob file
-    blob_path = Path(repo) / match["blob"]
-    try:
-        blob_path.unlink()
-    except FileNotFoundError:
-        pass
-    # Remove entry
-    inner.files = [f for f in inner.files if f["id"] != fid]
-
-    # Re-encrypt inner with existing kmaster (we need kmaster; unlock returns it)
-    # Re-derive kmaster for encryption
-    kmaster = derive_kmaster(args.passphrase, kdf["salt"], kdf["t"], kdf["m"], kdf["p"])
-    inner_bytes = InnerMetadata(version=1, files=inner.files).to_bytes()
-    new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-    save_vault(repo_paths(repo)["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
-    print(f"[+] Removed id={fid}")
+    inner, kmaster, kdf = unlock(repo, args.passphrase)
+    # Check every id before touching any blob
+    for fid in args.ids:
+        if fid not in inner.by_id:
+            print(f"[!] No such id: {fid}")
+            sys.exit(1)
+    removed = list(dict.fromkeys(args.ids))
+    for fid in removed:
+        blob_path = Path(repo) / inner.by_id[fid]["blob"]
+        try:
+            blob_path.unlink()
+        except FileNotFoundError:
+            pass
+    inner.remove_many(removed)
+
+    # Re-encrypt inner and save vault once for the whole batch
+    save_inner(repo, inner, kmaster, kdf)
+    for fid in removed:
+        print(f"[+] Removed id={fid}")
 
 
 def cmd_rename(args: argparse.Namespace) -> None:
     repo = Path(args.repo)
     fid = args.id
     new_name = args.name
-    inner, _, kdf = unlock(repo, args.passphrase)
-    match = next((f for f in inner.files if f["id"] == fid), None)
+    inner, kmaster, kdf = unlock(repo, args.passphrase)
+    match = inner.by_id.get(fid)
     if not match:
         print(f"[!] No such id: {fid}")
         sys.exit(1)
     match["name"] = new_name
 
-    kmaster = derive_kmaster(args.passphrase, kdf["salt"], kdf["t"], kdf["m"], kdf["p"])
-    inner_bytes = InnerMetadata(version=1, files=inner.files).to_bytes()
-    new_nonce, new_ct = aead_encrypt(kmaster, inner_bytes)
-    save_vault(repo_paths(repo)["vault"], kdf["t"], kdf["m"], kdf["p"], kdf["salt"], new_nonce, new_ct)
+    save_inner(repo, inner, kmaster, kdf)
     print(f"[+] Renamed id={fid} -> {new_name}")
 
 
-def cmd_rotate_master(args: argparse.Namespace) -> None:
+def cmd_rotate_master(args: argparse.Namespace) -> tuple[bytes, Dict[str, int | bytes]]:
     """Rotate master key by changing salt and Argon2 params; rewrap all file keys.
     Steps:
       1) Unlock with old master; obtain inner metadata and unwrap nothing yet.
       2) Generate new salt (or use provided) and params; derive new_kmaster.
       3) For each file: unwrap file_key using old_kmaster, then rewrap with new_kmaster.
       4) Re-encrypt inner JSON under new_kmaster and write new header.
+    Blobs are never read or rewritten: they are encrypted under their own file keys,
+    which do not change. Rotation cost is O(files) small AEAD ops, independent of data
+    size. A future "re-key blobs" mode must not fall back to a read/write loop for bytes
+    that stay the same; use os.copy_file_range (reflink on btrfs/xfs) instead.
+
+    Returns the new kmaster and its KDF header (as unlock() would), so a caller
+    holding the vault open can go on without deriving the key again.
     """
     repo = Path(args.repo)
-    inner, old_kmaster, old_kdf = unlock(repo, args.passphrase)
+    _, old_kmaster, old_kdf = unlock(repo, args.passphrase)
 
     # New KDF params
     new_t = args.t if args.t is not None else old_kdf["t"]
@@ -75,18 +80,45 @@ def cmd_rotate_master(args: argparse.Namespace) -> None:
 
     new_kmaster = derive_kmaster(args.new_passphrase or args.passphrase, new_salt, new_t, new_m, new_p)
 
-    # Rewrap file keys
-    import base64
-    for f in inner.files:
-        wrap = f["file_key_wrap"]
-        file_key = aead_decrypt(old_kmaster, base64.b64decode(wrap["nonce"]), base64.b64decode(wrap["ct"]))
-        n, c = aead_encrypt(new_kmaster, file_key)
-        f["file_key_wrap"] = {"nonce": base64.b64encode(n).decode(), "ct": base64.b64encode(c).decode()}
+    # One AESGCM per master: each key schedule is expanded once and reused
+    # for every rewrap (and, for the new master, the inner metadata)
+    old_aead = AESGCM(old_kmaster)
+    new_aead = AESGCM(new_kmaster)
+
+    # Read-rewrap-write without a save slipping in between; the metadata is
+    # re-read so saves made while the keys were derived are not lost
+    with save_lock:
+        inner = reload_manifest(repo, old_kmaster)
+
+        # Rewrap file keys
+        for f in inner.files:
+            wrap = f["file_key_wrap"]
+            file_key = old_aead.decrypt(wrap["nonce"], wrap["ct"], None)
+            n = csprng(12)
+            c = new_aead.encrypt(n, file_key, None)
+            f["file_key_wrap"] = {"nonce": n, "ct": c}
+
+        # Re-encrypt inner under new master
+        inner_bytes = inner.to_bytes()
+        nonce = csprng(12)
+        ct = new_aead.encrypt(nonce, inner_bytes, None)
+
+        save_vault(repo_paths(repo)["vault"], new_t, new_m, new_p, new_salt, nonce, ct)
+    clear_key_cache()  # the old master must not linger in the AESGCM cache
+    print("[+] Master key rotated.")
+    return new_kmaster, {"t": new_t, "m": new_m, "p": new_p, "salt": new_salt, "ver": VAULT_VERSION}
+
 
-    # Re-encrypt inner under new master
-    inner_bytes = InnerMetadata(version=1, files=inner.files).to_bytes()
-    nonce, ct = aead_encrypt(new_kmaster, inner_bytes)
+def calibrate_kdf(target_ms: float, m_cost_kib: int | None = None, parallelism: int | None = None) -> tuple[int, int, int]:
+    """Pick (t, m, p) so that unlocking takes about target_ms on this machine."""
+    default_m, default_p = default_kdf_resources()
+    m = m_cost_kib or default_m
+    p = parallelism or default_p
+    t = calibrate_t_cost(target_ms, m, p)
+    return t, m, p
 
-    save_vault(repo_paths(repo)["vault"], new_t, new_m, new_p, new_salt, nonce, ct)
-    print("[+] Master key rotated.")
 
+def cmd_calibrate(args: argparse.Namespace) -> None:
+    print(f"[*] Calibrating Argon2id for ~{args.target_ms} ms ...")
+    t, m, p = calibrate_kdf(args.target_ms, args.m, args.p)
+    print(f"[+] Suggested parameters: -t {t} -m {m} -p {p}")